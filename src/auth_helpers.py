@@ -1,18 +1,44 @@
-import json
+import asyncio
 import traceback
-from pathlib import Path
-from supabase_client import supabase
 
-SESSION_FILE = Path(".session.json")
+import jwt
 
+from jwt_verifier import jwt_verifier
+from supabase_client import session_client
+from token_manager import TokenManager, ClientSessionStorage
 
-def try_auto_login(on_success):
+# Used by scripts and when no Flet page is available
+token_manager = TokenManager(client_factory=session_client, verifier=jwt_verifier)
+
+
+def get_token_manager(page=None) -> TokenManager:
+    """
+    Returns the token manager for a Flet session, bound to that session's
+    client and browser storage. Without a page, returns the module-level one.
+    """
+    if page is None:
+        return token_manager
+
+    manager = page.session.get("token_manager")
+    if manager is None:
+        # The client is only created once the session needs it, so a first
+        # visit without a saved login doesn't wait for the Supabase import
+        manager = TokenManager(
+            client_factory=lambda: session_client(page),
+            storage=ClientSessionStorage(page),
+            verifier=jwt_verifier,
+        )
+        page.session.set("token_manager", manager)
+    return manager
+
+
+def try_auto_login(on_success, page=None):
     """
     Attempt to restore session from saved token.
     Calls on_success(user_id) if valid, returns True.
     Returns False otherwise.
     """
-    user_id = apply_saved_token()
+    user_id = apply_saved_token(page)
     if user_id:
         print(f"✅ Auto-login succeeded: {user_id}")
         on_success(user_id)
@@ -20,81 +46,69 @@ def try_auto_login(on_success):
     return False
 
 
-def save_session_and_auth(session):
-    """Save session to disk and apply PostgREST auth header."""
-    SESSION_FILE.write_text(session.model_dump_json())
-    supabase.postgrest.auth(session.access_token)
+def save_session_and_auth(session, page=None):
+    """Save session and apply PostgREST auth header."""
+    get_token_manager(page).store(session)
+    if page is not None:
+        cache_user_profile(session.user, page)
 
 
-def clear_session():
-    """Remove local session file and reset PostgREST auth header."""
-    SESSION_FILE.unlink(missing_ok=True)
+def clear_session(page=None):
+    """Remove saved session and reset PostgREST auth header."""
+    get_token_manager(page).clear()
+    if page is not None:
+        page.session.set("user_profile", None)
 
-    # Instead of passing None or "", manually clear the Authorization header
-    if "Authorization" in supabase.postgrest.headers:
-        del supabase.postgrest.headers["Authorization"]
 
-
-def apply_saved_token() -> str | None:
+def apply_saved_token(page=None) -> str | None:
     """
     Ensures PostgREST has a valid token.
-    If access_token is expired, it tries to refresh with refresh_token.
-    Returns the user ID if successful, else None.
+    The session is held in memory; it is only refreshed when the access
+    token is close to expiry. Returns the user ID if successful, else None.
     """
-    if SESSION_FILE.exists():
-        try:
-            saved = json.loads(SESSION_FILE.read_text())
-            access_token = saved.get("access_token")
-            refresh_token = saved.get("refresh_token")
-
-            res = supabase.auth.set_session(access_token, refresh_token)
-
-            if res and res.session and res.user:
-                save_session_and_auth(res.session)
-                return res.user.id
-            else:
-                clear_session()
-        except Exception as ex:
-            print("❌ apply_saved_token failed:", ex)
-            traceback.print_exc()
-            clear_session()
+    try:
+        return get_token_manager(page).ensure_valid()
+    except Exception as ex:
+        print("❌ apply_saved_token failed:", ex)
+        traceback.print_exc()
+        clear_session(page)
     return None
 
 
-def logout_user():
+def logout_user(page=None):
     """Log out current user and clear session."""
     try:
-        supabase.auth.sign_out()
+        session_client(page).auth.sign_out()
     except Exception as ex:
         print("⚠️ Error during supabase sign_out:", ex)
 
-    clear_session()
+    clear_session(page)
     print("👋 User logged out successfully")
 
 
 # --- Authentication helpers ---
-def safe_sign_in(email: str, password: str):
+def safe_sign_in(email: str, password: str, page=None):
     try:
-        return supabase.auth.sign_in_with_password({"email": email, "password": password})
+        return session_client(page).auth.sign_in_with_password({"email": email, "password": password})
     except Exception as ex:
         print(f"❌ safe_sign_in failed for {email}:", ex)
         traceback.print_exc()
         return None
 
 
-def safe_sign_up(email: str, password: str):
+def safe_sign_up(email: str, password: str, page=None):
     try:
-        return supabase.auth.sign_up({"email": email, "password": password})
+        return session_client(page).auth.sign_up({"email": email, "password": password})
     except Exception as ex:
         print(f"❌ safe_sign_up failed for {email}:", ex)
         traceback.print_exc()
         return None
     
 # --- Password reset ---
-def safe_reset_password(email: str):
+def safe_reset_password(email: str, page=None):
     """Send a password reset email safely."""
     try:
-        return supabase.auth.reset_password_for_email(email)
+        return session_client(page).auth.reset_password_for_email(email)
     except Exception as ex:
         print(f"❌ safe_reset_password failed for {email}:", ex)
         traceback.print_exc()
@@ -102,7 +116,70 @@ def safe_reset_password(email: str):
 
 
 # --- User info ---
-def get_current_user() -> dict | None:
+def _user_to_dict(u) -> dict | None:
+    """Normalize a gotrue User (object or dict) to {"id", "email", "user_metadata"}."""
+    if not u:
+        return None
+    # Try to access as object, then as dict; normalize to dict
+    try:
+        meta = dict(u.user_metadata or {})
+        uid = getattr(u, "id", None)
+        email = getattr(u, "email", None)
+    except Exception:
+        # Fallback if u is already a dict-like
+        u = dict(u)
+        meta = dict(u.get("user_metadata") or {})
+        uid = u.get("id")
+        email = u.get("email")
+    return {"id": uid, "email": email, "user_metadata": meta}
+
+
+def cache_user_profile(user, page) -> dict | None:
+    """Store a user (gotrue User or dict) as this Flet session's cached profile."""
+    profile = _user_to_dict(user)
+    page.session.set("user_profile", profile)
+    return profile
+
+
+def get_user_profile(page) -> dict | None:
+    """
+    Same shape as get_current_user, but served from the per-session cache
+    without a network call. The cache is filled from the user saved with the
+    session at login and updated in place when the profile is edited.
+    """
+    user_id = apply_saved_token(page)
+    if not user_id:
+        return None
+
+    profile = page.session.get("user_profile")
+    if profile and profile["id"] == user_id:
+        return profile
+
+    profile = _user_to_dict(get_token_manager(page).user)
+    if profile and profile["id"] == user_id:
+        page.session.set("user_profile", profile)
+        return profile
+
+    # Sessions saved before the user was kept alongside them
+    profile = get_current_user(page)
+    page.session.set("user_profile", profile)
+    return profile
+
+
+async def revalidate_user_profile(page, on_change=None):
+    """
+    Fetch the user from Supabase Auth in the background and update the cache,
+    e.g. after the profile was edited on another device. Calls on_change()
+    only if the cached profile was different.
+    """
+    user = await asyncio.to_thread(get_current_user, page, True)
+    if user and user != page.session.get("user_profile"):
+        page.session.set("user_profile", user)
+        if on_change:
+            on_change()
+
+
+def get_current_user(page=None, remote: bool = False) -> dict | None:
     """
     Returns a dict like:
     {
@@ -111,29 +188,25 @@ def get_current_user() -> dict | None:
         "user_metadata": {...}
     }
     or None if not logged in.
+
+    The user is read from the verified access token when it can be checked
+    locally; remote=True (or a token that can't be checked) asks Supabase Auth.
     """
     try:
         # Ensure token is applied / refreshed if needed
-        apply_saved_token()
-
-        res = supabase.auth.get_user()
-        u = getattr(res, "user", None) if res else None
-        if not u:
+        if not apply_saved_token(page):
             return None
 
-        # Try to access as object, then as dict; normalize to dict
-        try:
-            meta = dict(u.user_metadata or {})
-            uid = getattr(u, "id", None)
-            email = getattr(u, "email", None)
-        except Exception:
-            # Fallback if u is already a dict-like
-            u = dict(u)
-            meta = dict(u.get("user_metadata") or {})
-            uid = u.get("id")
-            email = u.get("email")
-
-        return {"id": uid, "email": email, "user_metadata": meta}
+        access_token = get_token_manager(page).access_token
+        if not remote:
+            try:
+                return jwt_verifier.verified_user(access_token, lambda: session_client(page))
+            except jwt.InvalidTokenError as ex:
+                print("⚠️ Access token failed verification:", ex)
+                return None
+
+        res = session_client(page).auth.get_user(access_token)
+        return _user_to_dict(getattr(res, "user", None) if res else None)
     except Exception as ex:
         print("⚠️ get_current_user failed:", ex)
         return None
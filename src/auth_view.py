@@ -1,3 +1,4 @@
+import asyncio
 import flet as ft
 from auth_helpers import save_session_and_auth, safe_sign_in, safe_sign_up, safe_reset_password
 
@@ -7,10 +8,10 @@ def auth_view(page: ft.Page, on_login_success):
     password_input = ft.TextField(label="Password", password=True, width=300)
     status_text = ft.Text("", color=ft.Colors.RED)
 
-    def do_login(e):
-        res = safe_sign_in(email_input.value, password_input.value)
+    async def do_login(e):
+        res = await asyncio.to_thread(safe_sign_in, email_input.value, password_input.value, page)
         if res and res.session and res.user:
-            save_session_and_auth(res.session)
+            await asyncio.to_thread(save_session_and_auth, res.session, page)
             status_text.value = "✅ Login successful!"
             status_text.color = ft.Colors.GREEN
             page.update()
@@ -20,10 +21,10 @@ def auth_view(page: ft.Page, on_login_success):
             status_text.color = ft.Colors.RED
             page.update()
 
-    def do_signup(e):
-        res = safe_sign_up(email_input.value, password_input.value)
+    async def do_signup(e):
+        res = await asyncio.to_thread(safe_sign_up, email_input.value, password_input.value, page)
         if res and res.session:
-            save_session_and_auth(res.session)
+            await asyncio.to_thread(save_session_and_auth, res.session, page)
             status_text.value = (
                 "✅ Signup successful! Please check your email to confirm your account."
             )
@@ -33,14 +34,14 @@ def auth_view(page: ft.Page, on_login_success):
             status_text.color = ft.Colors.RED
         page.update()
 
-    def do_reset_password(e):
+    async def do_reset_password(e):
         if not email_input.value.strip():
             status_text.value = "❌ Please enter your email to reset password."
             status_text.color = ft.Colors.RED
             page.update()
             return
 
-        res = safe_reset_password(email_input.value.strip())
+        res = await asyncio.to_thread(safe_reset_password, email_input.value.strip(), page)
         if res:
             status_text.value = "📧 Password reset email sent! Please check your inbox."
             status_text.color = ft.Colors.GREEN
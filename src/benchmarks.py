@@ -0,0 +1,259 @@
+"""
+Benchmarks for the app's hot paths, run against the in-memory Supabase
+stand-in (fake_supabase) through headless Flet sessions.
+
+    python src/benchmarks.py --latency 0.02 --repeat 5 > bench.jsonl
+
+Prints one JSON object per benchmark: wall-clock times in milliseconds,
+Supabase round trips per run (by endpoint) and websocket messages/bytes per
+run, tagged with the git commit so runs can be compared between commits.
+The app's own log output goes to stderr.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from fake_supabase import FakeSupabase, FAKE_ANON_KEY, FAKE_JWT_SECRET, LEAGUES, SEASON
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+def configure(url: str, service_key: str = ""):
+    """
+    Point the app at the stand-in. Must run before any app module is imported.
+    With a service key, saves go through the write-behind queue.
+    """
+    os.environ["SUPABASE_URL"] = url
+    os.environ["SUPABASE_ANON_KEY"] = FAKE_ANON_KEY
+    # Verify access tokens locally, as in production
+    os.environ["SUPABASE_JWT_SECRET"] = FAKE_JWT_SECRET
+    # Without one, saves go directly as the user
+    os.environ["SUPABASE_SERVICE_ROLE_KEY"] = service_key
+
+    # The real deadline has passed; keep the save path open
+    import constants
+    constants.deadline = datetime.now(timezone.utc) + timedelta(days=7)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+# --- Session helpers (shared with the load test) ---
+def seed_login(fake: FakeSupabase, session, email: str = BENCH_EMAIL):
+    """Put a signed-in session in the headless browser's storage, as for a returning visitor."""
+    from token_manager import ClientSessionStorage
+
+    with fake.data_lock:
+        auth_session = fake._issue_session(email)
+    session.conn.storage[ClientSessionStorage.KEY] = json.dumps(json.dumps(auth_session))
+
+
+async def log_in(session, email: str, password: str, wait: bool = True):
+    """Fill in and submit the login form, then (with wait) wait for the redirect's loads."""
+    import flet as ft
+
+    await session.go("/login")
+    email_input = session.find(ft.TextField, lambda c: c.label == "Email")
+    password_input = session.find(ft.TextField, lambda c: c.label == "Password")
+    email_input.value, password_input.value = email, password
+    await session.click(session.find(ft.ElevatedButton, lambda c: c.text == "Log In"))
+    if wait:
+        await session.idle()
+
+
+def reorder_event(session, old: int, new: int):
+    import flet as ft
+    from flet.core.control_event import ControlEvent
+    from flet.core.reorderable_list_view import OnReorderEvent
+
+    list_view = session.find(ft.ReorderableListView)
+    data = json.dumps({"old": old, "new": new})
+    return list_view, OnReorderEvent(ControlEvent(list_view.uid, "reorder", data, list_view, session.page))
+
+
+async def reorder(session, old: int, new: int):
+    list_view, event = reorder_event(session, old, new)
+    await session.fire(list_view.on_reorder, event)
+
+
+async def save(session, timeout: float = 30):
+    """
+    Click Save and wait for the confirmation snack bar. The tick icon is
+    hidden two seconds later by a separate task, which isn't waited for.
+    """
+    import flet as ft
+
+    button = session.find(ft.ElevatedButton, lambda c: c.text == "Save Prediction")
+    before = getattr(session.page, "snack_bar", None)
+    task = asyncio.ensure_future(session.click(button))
+    deadline = time.monotonic() + timeout
+    while getattr(session.page, "snack_bar", None) is before and not task.done() and time.monotonic() < deadline:
+        await asyncio.sleep(0.001)
+    saved = session.page.snack_bar is not before and "saved" in session.page.snack_bar.content.value
+    task.cancel()
+    return saved
+
+
+async def switch_tab(session, index: int):
+    import flet as ft
+    from flet.core.control_event import ControlEvent
+
+    tabs = session.find(ft.Tabs)
+    tabs.selected_index = index
+    await session.fire(tabs.on_change, ControlEvent(tabs.uid, "change", str(index), tabs, session.page))
+
+
+# --- Benchmarks ---
+class Runner:
+    def __init__(self, fake: FakeSupabase, repeat: int, latency: float, out=sys.stdout):
+        self.fake = fake
+        self.out = out
+        self.repeat = repeat
+        self.latency = latency
+        self.commit = git_commit()
+
+    async def measure(self, name: str, setup, step):
+        """
+        Run setup() then step(context) `repeat` times, timing only step.
+        setup returns (context, session) so websocket traffic can be counted.
+        """
+        times, trips, messages, sent = [], {}, 0, 0
+        for _ in range(self.repeat):
+            context, session = await setup()
+            if session:
+                await session.idle()
+                start_messages, start_bytes = session.conn.messages, session.conn.bytes_sent
+            self.fake.reset_counts()
+
+            start = time.perf_counter()
+            await step(context)
+            times.append((time.perf_counter() - start) * 1000)
+
+            for endpoint, count in self.fake.round_trips().items():
+                trips[endpoint] = trips.get(endpoint, 0) + count
+            if session:
+                messages += session.conn.messages - start_messages
+                sent += session.conn.bytes_sent - start_bytes
+                session.close()
+
+        result = {
+            "benchmark": name,
+            "commit": self.commit,
+            "latency_ms": self.latency * 1000,
+            "runs": self.repeat,
+            "median_ms": round(statistics.median(times), 2),
+            "min_ms": round(min(times), 2),
+            "max_ms": round(max(times), 2),
+            "round_trips": {k: v / self.repeat for k, v in sorted(trips.items())},
+            "total_round_trips": sum(trips.values()) / self.repeat,
+            "ws_messages": messages / self.repeat,
+            "ws_bytes": sent / self.repeat,
+        }
+        print(json.dumps(result), file=self.out, flush=True)
+        return result
+
+    async def run(self):
+        from headless import HeadlessSession
+        from main import main
+        from team_cache import team_catalog
+        from auth_helpers import get_current_user, get_user_profile
+
+        loop = asyncio.get_running_loop()
+
+        async def new_session(route="/", logged_in=True):
+            session = HeadlessSession(loop, route)
+            if logged_in:
+                seed_login(self.fake, session)
+            return session
+
+        async def started(logged_in=True):
+            session = await new_session(logged_in=logged_in)
+            await session.start(main)
+            return session, session
+
+        async def fresh():
+            session = await new_session()
+            return session, session
+
+        async def cold():
+            team_catalog.invalidate()
+            return await fresh()
+
+        # Opening the app as a returning user lands on /1to24s and loads all three leagues
+        await self.measure("load_teams_cold", cold, lambda s: s.start(main))
+        await self.measure("load_teams_warm", fresh, lambda s: s.start(main))
+
+        await self.measure("login", lambda: started(logged_in=False),
+                           lambda s: log_in(s, BENCH_EMAIL, BENCH_PASSWORD))
+        await self.measure("reorder", started, lambda s: reorder(s, 0, 23))
+        await self.measure("tab_switch", started, lambda s: switch_tab(s, 1))
+
+        async def save_step(session):
+            await reorder(session, 0, 23)
+            if not await save(session):
+                raise RuntimeError("save_prediction did not confirm the save")
+
+        await self.measure("save_prediction", started, save_step)
+
+        def user_step(fn):
+            async def step(session):
+                await asyncio.to_thread(fn, session.page)
+            return step
+
+        await self.measure("get_current_user", started, user_step(get_current_user))
+        await self.measure("get_current_user_remote", started,
+                           user_step(lambda page: get_current_user(page, remote=True)))
+        await self.measure("get_user_profile_cached", started, user_step(get_user_profile))
+
+        await self.measure("route_leaderboard_first_visit", started, lambda s: s.go("/leaderboard"))
+
+        async def cached_setup():
+            session, _ = await started()
+            await session.go("/leaderboard")
+            return session, session
+
+        await self.measure("route_1to24s_cached", cached_setup, lambda s: s.go("/1to24s"))
+        await self.measure("route_profile_first_visit", started, lambda s: s.go("/profile"))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the app against an in-memory Supabase stand-in.")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="seconds added to every Supabase round trip (default 0.02)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark (default 5)")
+    return parser.parse_args(argv)
+
+
+async def run_benchmarks(args):
+    fake = FakeSupabase(latency=args.latency).start()
+    configure(fake.url)
+    user = fake.add_user(BENCH_EMAIL, BENCH_PASSWORD, display_name="Bench")
+    # One league already has a saved prediction, so both load paths are exercised
+    teams = [t["id"] for t in fake.tables["teams"] if t["league"] == LEAGUES[0]]
+    fake.tables["predictions"].append(
+        {"user_id": user["id"], "league": LEAGUES[0], "season": SEASON, "rankings": teams[::-1]}
+    )
+    out = sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            await Runner(fake, args.repeat, args.latency, out).run()
+    finally:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmarks(parse_args()))
@@ -0,0 +1,306 @@
+"""
+Keeps in-process caches in step with the database through a change feed,
+instead of polling.
+
+ChangeFeed subscribes to row changes on `teams`, `predictions` and
+`standings` and hands each one to the handlers registered for its table: a
+`teams` change drops that league's catalog and consensus and rebuilds the
+season's leaderboards, a `predictions` change patches the leaderboards and
+consensus aggregates, and a `standings` change rescores the leaderboard.
+While the feed is live those caches are kept for hours; if it drops, they go back to
+their normal TTL until it reconnects (leaderboards are rebuilt by the
+standings poll, see leaderboard.start_standings_sync), and everything is
+invalidated or rebuilt on reconnect since changes may have been missed
+meanwhile.
+
+Sources:
+- RealtimeSource: Supabase Realtime postgres_changes. The tables must be in
+  the realtime publication, with full old rows for deletes:
+
+      alter publication supabase_realtime add table teams, predictions, standings;
+      alter table predictions replica identity full;
+
+- LocalChangeSource: in-process stand-in for tests and benchmarks; the fake
+  Supabase server publishes its writes to it (fake.change_listeners).
+
+Enabled in the app with CHANGE_FEED=1.
+"""
+import asyncio
+import os
+import threading
+import time
+import traceback
+
+from supabase_client import SUPABASE_URL, SUPABASE_KEY, SUPABASE_SERVICE_KEY
+
+CHANGE_FEED = os.getenv("CHANGE_FEED") == "1"
+TABLES = ("teams", "predictions", "standings")
+# Cache TTL while changes are arriving through the feed
+LIVE_CACHE_TTL_SECONDS = 6 * 60 * 60
+HEALTH_CHECK_SECONDS = 5
+RECONNECT_BASE_SECONDS = 1
+RECONNECT_MAX_SECONDS = 60
+
+
+class FeedDropped(Exception):
+    pass
+
+
+class RealtimeSource:
+    """Row changes from Supabase Realtime, on one channel for all tables."""
+
+    def __init__(self, url: str | None = SUPABASE_URL, key: str | None = None):
+        self.url = url
+        # Realtime applies RLS; other users' predictions need the service key
+        self.key = key or SUPABASE_SERVICE_KEY or SUPABASE_KEY
+
+    @staticmethod
+    def _change(payload: dict) -> dict:
+        data = payload.get("data", {})
+        return {
+            "table": data.get("table"),
+            "type": data.get("type"),
+            "record": data.get("record") or {},
+            "old_record": data.get("old_record") or {},
+        }
+
+    async def run(self, feed: "ChangeFeed", tables):
+        from realtime import AsyncRealtimeClient, RealtimeSubscribeStates
+
+        # Reconnects are handled by ChangeFeed, which knows to invalidate after one
+        client = AsyncRealtimeClient(f"{self.url}/realtime/v1", token=self.key, auto_reconnect=False)
+        channel = client.channel("cache-invalidation")
+        for table in tables:
+            channel.on_postgres_changes(
+                "*", schema="public", table=table, callback=lambda payload: feed.push(self._change(payload))
+            )
+
+        dropped = asyncio.Event()
+
+        def on_state(state, error):
+            if state == RealtimeSubscribeStates.SUBSCRIBED:
+                feed.set_live(True)
+            else:
+                print(f"⚠️ change_feed: channel {state.value}", error or "")
+                dropped.set()
+
+        try:
+            await channel.subscribe(on_state)
+            while not dropped.is_set():
+                # The client doesn't report a closed socket when auto_reconnect is off
+                listener = client._listen_task
+                if listener is None or listener.done():
+                    raise FeedDropped("realtime socket closed")
+                try:
+                    await asyncio.wait_for(dropped.wait(), HEALTH_CHECK_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+            raise FeedDropped("realtime channel closed")
+        finally:
+            await client.close()
+
+
+class LocalChangeSource:
+    """
+    In-process change source. publish() may be called from any thread;
+    drop() ends the current connection, as if the socket had closed.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._queue = None
+        self._backlog = []
+
+    def publish(self, table: str, type: str, record: dict | None = None, old_record: dict | None = None):
+        change = {"table": table, "type": type, "record": record or {}, "old_record": old_record or {}}
+        if self._loop is None:
+            self._backlog.append(change)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, change)
+
+    def drop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+
+    async def run(self, feed: "ChangeFeed", tables):
+        self._queue = asyncio.Queue()
+        for change in self._backlog:
+            self._queue.put_nowait(change)
+        self._backlog.clear()
+        self._loop = asyncio.get_running_loop()
+        feed.set_live(True)
+
+        while (change := await self._queue.get()) is not None:
+            if change["table"] in tables:
+                feed.push(change)
+        self._loop = None
+        raise FeedDropped("local source dropped")
+
+
+class ChangeFeed:
+    """
+    Delivers row changes to per-table handlers, in order, on a worker
+    thread (handlers may query Supabase). Status handlers are called with
+    True when the feed becomes live and False when it drops.
+    """
+
+    def __init__(self, source=None, tables=TABLES):
+        self.source = source or RealtimeSource()
+        self.tables = tables
+        self.live = False
+        self.events = 0
+        self.drops = 0
+        self._handlers = {}  # table -> [handler(change)]
+        self._status_handlers = []
+        self._queue = None
+
+    def on(self, table: str, handler):
+        self._handlers.setdefault(table, []).append(handler)
+
+    def on_status(self, handler):
+        self._status_handlers.append(handler)
+
+    def set_live(self, live: bool):
+        if live == self.live:
+            return
+        self.live = live
+        if live:
+            print("📡 change_feed: live")
+        else:
+            self.drops += 1
+            print("⚠️ change_feed: dropped; caches fall back to TTL expiry")
+        for handler in self._status_handlers:
+            try:
+                handler(live)
+            except Exception:
+                traceback.print_exc()
+
+    def push(self, change: dict):
+        """Queue a change for the handlers. Called on the feed's event loop."""
+        self._queue.put_nowait(change)
+
+    async def _deliver(self):
+        while True:
+            change = await self._queue.get()
+            self.events += 1
+            for handler in self._handlers.get(change["table"], []):
+                try:
+                    await asyncio.to_thread(handler, change)
+                except Exception:
+                    print(f"❌ change_feed: handler failed for {change['type']} on {change['table']}")
+                    traceback.print_exc()
+
+    async def run(self):
+        """Stay subscribed, reconnecting with backoff. Runs until cancelled."""
+        self._queue = asyncio.Queue()
+        deliver = asyncio.create_task(self._deliver())
+        delay = RECONNECT_BASE_SECONDS
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    await self.source.run(self, self.tables)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as ex:
+                    print("⚠️ change_feed:", ex)
+                self.set_live(False)
+                if time.monotonic() - started > RECONNECT_MAX_SECONDS:
+                    delay = RECONNECT_BASE_SECONDS
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+        finally:
+            deliver.cancel()
+            self.set_live(False)
+
+
+# --- Cache handlers ---
+def _on_team_change(change: dict):
+    from consensus import consensus_tables
+    from leaderboard import rebuild_leaderboards
+    from team_cache import team_catalog
+
+    row = change["record"] or change["old_record"]
+    if row.get("league") and row.get("season"):
+        team_catalog.invalidate(row["league"], row["season"])
+        consensus_tables.invalidate(row["league"], row["season"])
+        rebuild_leaderboards(row["season"])
+    else:
+        team_catalog.invalidate()
+        consensus_tables.invalidate()
+        rebuild_leaderboards()
+
+
+def _on_prediction_change(change: dict):
+    from consensus import consensus_tables
+    from leaderboard import leaderboards, record_delete, record_save
+    from ranking_codec import rankings_from_row
+    from team_cache import get_catalog
+
+    row = change["record"] or change["old_record"]
+    user_id, league, season = row.get("user_id"), row.get("league"), row.get("season")
+    if not (user_id and league and season):
+        print(f"⚠️ change_feed: {change['type']} on predictions without its key; "
+              "is replica identity full set?")
+        return
+    if (league, season) not in leaderboards and not consensus_tables.cached(league, season):
+        return
+
+    if change["type"] == "DELETE":
+        record_delete(league, season, user_id)
+        consensus_tables.record_delete(league, season, user_id)
+        return
+    catalog = get_catalog(league, season) if row.get("positions") else []
+    rankings = rankings_from_row(row, catalog)
+    if rankings:
+        record_save(league, season, user_id, rankings)
+        consensus_tables.record_save(league, season, user_id, rankings)
+
+
+def _on_standings_change(change: dict):
+    from leaderboard import sync_standings
+
+    row = change["record"]
+    if row.get("season"):
+        sync_standings(row["season"])
+
+
+def _rebuild_leaderboards():
+    from leaderboard import rebuild_leaderboards
+
+    try:
+        rebuild_leaderboards()
+    except Exception:
+        print("❌ change_feed: leaderboard rebuild failed")
+        traceback.print_exc()
+
+
+def _on_status(live: bool):
+    from consensus import consensus_tables, CONSENSUS_TTL_SECONDS
+    from team_cache import team_catalog, CATALOG_TTL_SECONDS
+
+    if live:
+        # Changes made while the feed was down were missed
+        team_catalog.invalidate()
+        consensus_tables.invalidate()
+        # Leaderboards have no TTL; rebuild them off the feed's loop
+        threading.Thread(target=_rebuild_leaderboards, name="leaderboard-rebuild", daemon=True).start()
+        team_catalog.ttl = consensus_tables.ttl = LIVE_CACHE_TTL_SECONDS
+    else:
+        team_catalog.ttl = CATALOG_TTL_SECONDS
+        consensus_tables.ttl = CONSENSUS_TTL_SECONDS
+
+
+def install_cache_handlers(feed: ChangeFeed) -> ChangeFeed:
+    feed.on("teams", _on_team_change)
+    feed.on("predictions", _on_prediction_change)
+    feed.on("standings", _on_standings_change)
+    feed.on_status(_on_status)
+    return feed
+
+
+def start_change_feed(source=None) -> ChangeFeed:
+    """Run a change feed wired to the app's caches on a background thread with its own loop."""
+    feed = install_cache_handlers(ChangeFeed(source))
+    threading.Thread(target=asyncio.run, args=(feed.run(),), name="change-feed", daemon=True).start()
+    return feed
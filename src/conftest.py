@@ -0,0 +1,24 @@
+"""
+Shared test setup. App modules read the Supabase settings when they are
+imported, so the in-memory stand-in (fake_supabase) is started and the app
+pointed at it before any test module is collected.
+"""
+import pytest
+
+from benchmarks import configure
+from fake_supabase import FakeSupabase, FAKE_SERVICE_KEY, seed_teams
+
+_fake = FakeSupabase().start()
+configure(_fake.url, FAKE_SERVICE_KEY)
+
+
+@pytest.fixture
+def fake():
+    """The stand-in, with its tables back to the seeded teams and no predictions."""
+    from team_cache import team_catalog
+
+    with _fake.data_lock:
+        _fake.tables = {"teams": seed_teams(), "predictions": []}
+    team_catalog.invalidate()
+    yield _fake
+    team_catalog.invalidate()
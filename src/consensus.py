@@ -0,0 +1,185 @@
+"""
+The crowd's consensus ranking for each league/season, kept in memory.
+
+Per team it holds the running sum and sum of squares of predicted positions
+and a histogram of how often each position was picked, so means, spreads
+and the table itself are read without touching the predictions table. A
+save subtracts the user's previous ranking and adds the new one: O(teams),
+not a rescan. Aggregates are built from the predictions table on first use
+and rebuilt after `ttl`, which the change feed raises while it keeps them
+up to date across machines.
+"""
+import threading
+import time
+import numpy as np
+from scoring import load_predictions, position_matrix
+from supabase_client import service_client
+from team_cache import get_catalog
+
+CONSENSUS_TTL_SECONDS = 15 * 60
+
+
+class Consensus:
+    """Running position statistics for one league/season's catalog."""
+
+    def __init__(self, team_ids: list[str]):
+        n = len(team_ids)
+        self.team_ids = list(team_ids)
+        self.column = {team_id: i for i, team_id in enumerate(team_ids)}
+        self.count = 0
+        self.sums = np.zeros(n, dtype=np.int64)
+        self.sq_sums = np.zeros(n, dtype=np.int64)
+        # histogram[t, p]: predictions that put team t at 0-based position p
+        self.histogram = np.zeros((n, n), dtype=np.int32)
+        self.positions = {}  # user_id -> int8 positions per team, to undo on re-save
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_matrix(cls, team_ids: list[str], user_ids: list[str], matrix: np.ndarray) -> "Consensus":
+        """Build from a (users x teams) matrix of positions, as from scoring.position_matrix."""
+        consensus = cls(team_ids)
+        matrix = matrix.astype(np.int64).reshape(-1, len(team_ids))
+        consensus.count = len(user_ids)
+        consensus.sums = matrix.sum(axis=0)
+        consensus.sq_sums = (matrix ** 2).sum(axis=0)
+        for t in range(len(team_ids)):
+            consensus.histogram[t] = np.bincount(matrix[:, t], minlength=len(team_ids))
+        consensus.positions = {u: row.astype(np.int8) for u, row in zip(user_ids, matrix)}
+        return consensus
+
+    def _positions(self, ranking: list[str]) -> np.ndarray:
+        cols = [self.column[team_id] for team_id in ranking]
+        if len(cols) != len(self.team_ids) or len(set(cols)) != len(cols):
+            raise ValueError("ranking is not a permutation of the league's teams")
+        positions = np.empty(len(cols), dtype=np.int8)
+        positions[cols] = np.arange(len(cols))
+        return positions
+
+    def _apply(self, positions: np.ndarray, sign: int):
+        p = positions.astype(np.int64)
+        self.sums += sign * p
+        self.sq_sums += sign * p * p
+        self.histogram[np.arange(len(p)), p] += sign
+
+    def update_user(self, user_id: str, ranking: list[str]):
+        """Replace a user's ranking (team IDs, first place first) in the aggregate."""
+        positions = self._positions(ranking)
+        with self._lock:
+            old = self.positions.get(user_id)
+            if old is None:
+                self.count += 1
+            else:
+                self._apply(old, -1)
+            self._apply(positions, 1)
+            self.positions[user_id] = positions
+
+    def remove_user(self, user_id: str):
+        with self._lock:
+            old = self.positions.pop(user_id, None)
+            if old is not None:
+                self._apply(old, -1)
+                self.count -= 1
+
+    def table(self) -> list[dict]:
+        """Teams by mean predicted position (1-based), best first."""
+        with self._lock:
+            count = self.count
+            sums, sq_sums, histogram = self.sums.copy(), self.sq_sums.copy(), self.histogram.copy()
+        if not count:
+            return []
+
+        means = sums / count
+        stdevs = np.sqrt(np.maximum(sq_sums / count - means ** 2, 0))
+        modes = histogram.argmax(axis=1)
+        order = np.lexsort((np.arange(len(means)), means))
+        return [
+            {
+                "rank": rank + 1,
+                "team_id": self.team_ids[t],
+                "mean": float(means[t]) + 1,
+                "stdev": float(stdevs[t]),
+                "mode": int(modes[t]) + 1,
+                "mode_share": float(histogram[t, modes[t]] / count),
+                "histogram": histogram[t].tolist(),
+            }
+            for rank, t in enumerate(order)
+        ]
+
+
+class ConsensusTables:
+    """Consensus aggregates by (league, season), built on first use."""
+
+    def __init__(self, ttl: float = CONSENSUS_TTL_SECONDS):
+        self.ttl = ttl
+        self._tables = {}  # (league, season) -> Consensus
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _fresh(self, key) -> Consensus | None:
+        table = self._tables.get(key)
+        if table and time.monotonic() - table.built_at < self.ttl:
+            return table
+        return None
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def cached(self, league: str, season: str) -> Consensus | None:
+        """The aggregate if it's in memory and fresh; never queries."""
+        return self._fresh((league, season))
+
+    def get(self, league: str, season: str = "2025/2026", client=None) -> Consensus | None:
+        """The aggregate for a league, scanning its predictions once if it isn't in memory."""
+        key = (league, season)
+        table = self._fresh(key)
+        if table is None:
+            with self._key_lock(key):
+                table = self._fresh(key)
+                if table is None:
+                    table = self._build(league, season, client)
+                    if table is not None:
+                        self._tables[key] = table
+        return table
+
+    def _build(self, league: str, season: str, client=None) -> Consensus | None:
+        # Every user's predictions: under RLS the anon key would only see a few
+        client = client or service_client()
+        if client is None:
+            print("⚠️ consensus: SUPABASE_SERVICE_ROLE_KEY is not set; consensus not built")
+            return None
+        catalog = get_catalog(league, season, client)
+        if not catalog:
+            return None
+        team_ids = [team["id"] for team in catalog]
+        predictions = load_predictions(league, season, client)
+        user_ids, matrix, rejected = position_matrix(predictions, team_ids, catalog)
+        if rejected:
+            print(f"⚠️ consensus: skipped {len(rejected)} predictions with stale rankings")
+        print(f"📊 consensus: built {league} {season} from {len(user_ids)} predictions")
+        return Consensus.from_matrix(team_ids, user_ids, matrix)
+
+    def record_save(self, league: str, season: str, user_id: str, rankings: list[str]):
+        """Apply a saved prediction to an aggregate already in memory."""
+        table = self._tables.get((league, season))
+        if table is not None:
+            try:
+                table.update_user(user_id, rankings)
+            except (KeyError, ValueError) as ex:
+                print(f"⚠️ consensus: could not apply {user_id}'s ranking:", ex)
+
+    def record_delete(self, league: str, season: str, user_id: str):
+        table = self._tables.get((league, season))
+        if table is not None:
+            table.remove_user(user_id)
+
+    def invalidate(self, league: str | None = None, season: str | None = None):
+        """Drop aggregates so they're rebuilt. With no arguments, clears everything."""
+        with self._lock:
+            for key in list(self._tables):
+                if league in (None, key[0]) and season in (None, key[1]):
+                    del self._tables[key]
+
+
+consensus_tables = ConsensusTables()
@@ -0,0 +1,75 @@
+import asyncio
+import flet as ft
+from consensus import consensus_tables
+from team_cache import get_catalog
+from supabase_helpers import run_for_route
+
+
+def consensus_view(page: ft.Page):
+    page.title = "EFL 1 to 24s Consensus"
+    season = "2025/2026"
+
+    rows = ft.Column(spacing=6)
+    summary_text = ft.Text("", size=16, weight=ft.FontWeight.BOLD)
+
+    def selected_league():
+        return tabs.tabs[tabs.selected_index].text.lower().replace(" ", "_")
+
+    def show(consensus, names):
+        """Render an aggregate already in memory, with team names by ID."""
+        rows.controls.clear()
+        if consensus is None or not consensus.count:
+            summary_text.value = ""
+            rows.controls.append(ft.Text("No predictions yet.", italic=True))
+            return
+
+        summary_text.value = f"The crowd's table, from {consensus.count} predictions"
+        for entry in consensus.table():
+            rows.controls.append(
+                ft.Row(
+                    [
+                        ft.Text(f"{entry['rank']}.", width=40),
+                        ft.Text(names.get(entry["team_id"], entry["team_id"][:8]), width=220),
+                        ft.Text(f"avg {entry['mean']:.1f} ± {entry['stdev']:.1f}", width=120),
+                        ft.Text(f"most picked {entry['mode']} ({entry['mode_share']:.0%})"),
+                    ],
+                    spacing=10,
+                )
+            )
+
+    async def load():
+        league = selected_league()
+        consensus = consensus_tables.cached(league, season)
+        if consensus is None:
+            # First view since start-up (or since a rebuild): one scan, off the UI thread
+            rows.controls = [ft.ProgressRing()]
+            summary_text.value = ""
+            page.update()
+            consensus = await asyncio.to_thread(consensus_tables.get, league, season)
+        # Cached after the first load, but may still need a round trip
+        catalog = await asyncio.to_thread(get_catalog, league, season)
+        if league == selected_league():
+            show(consensus, {team["id"]: team["name"] for team in catalog or []})
+            page.update()
+
+    tabs = ft.Tabs(
+        selected_index=0,
+        on_change=lambda e: run_for_route(page, load),
+        tabs=[
+            ft.Tab(text="Championship"),
+            ft.Tab(text="League One"),
+            ft.Tab(text="League Two"),
+        ],
+    )
+
+    return ft.Column(
+        controls=[
+            ft.Text("👥 Consensus", size=24, weight=ft.FontWeight.BOLD),
+            tabs,
+            summary_text,
+            rows,
+        ],
+        spacing=20,
+        # The aggregate moves with every save; re-read it when the view is shown
+        data={"on_show": lambda: run_for_route(page, load)},
+    )
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from constants import deadline
+
+
+def format_remaining(now: datetime, until: datetime) -> tuple[str, bool]:
+    """Returns (countdown text, locked) for the given moment."""
+    if now >= until:
+        return "🚫 Deadline passed – predictions locked!", True
+
+    total_seconds = int((until - now).total_seconds())
+    days, remainder = divmod(total_seconds, 86400)
+    hours, remainder = divmod(remainder, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"⏳ Time left: {days}d {hours:02}h {minutes:02}m {seconds:02}s", False
+
+
+class CountdownBroadcaster:
+    """
+    One ticker per process: computes the countdown once a second and hands
+    the text to every subscribed view, instead of each session running its
+    own loop. The ticker stops when nobody is subscribed or the deadline passes.
+    """
+
+    def __init__(self, until: datetime):
+        self.until = until
+        self.ticks = 0
+        self._subscribers = {}
+        self._task = None
+        self._current = format_remaining(datetime.now(timezone.utc), until)
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while self._subscribers:
+            self._current = format_remaining(datetime.now(timezone.utc), self.until)
+            self.ticks += 1
+            for key, on_tick in list(self._subscribers.items()):
+                try:
+                    on_tick(*self._current)
+                except Exception as ex:
+                    # Session went away without unsubscribing
+                    print("⚠️ Countdown subscriber dropped:", ex)
+                    self._subscribers.pop(key, None)
+            if self._current[1]:
+                break
+            # Wake on the next whole second
+            await asyncio.sleep(1 - time.time() % 1)
+
+    async def follow(self, on_tick):
+        """
+        Calls on_tick(text, locked) on every tick until cancelled.
+        Run it as a route task so leaving the view unsubscribes it.
+        """
+        key = object()
+        self._subscribers[key] = on_tick
+        self._current = format_remaining(datetime.now(timezone.utc), self.until)
+        on_tick(*self._current)
+        try:
+            self._ensure_running()
+            await asyncio.get_running_loop().create_future()
+        finally:
+            self._subscribers.pop(key, None)
+
+
+countdown = CountdownBroadcaster(deadline)
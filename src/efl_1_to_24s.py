@@ -1,25 +1,125 @@
 import flet as ft
-from supabase_client import supabase
+from supabase_client import supabase, async_session_client
 from datetime import datetime, timezone, timedelta
 import asyncio
 from pathlib import Path
 from constants import deadline
+from countdown import countdown
+from leaderboard import record_save
+from consensus import consensus_tables
+from save_queue import save_queue
 import json
-from auth_helpers import apply_saved_token
-from supabase_helpers import safe_execute
+from auth_helpers import apply_saved_token, get_token_manager
+from supabase_helpers import safe_execute, safe_execute_async, run_for_route
+from team_cache import team_catalog, get_catalog
+from ranking_codec import (
+    COMPACT_RANKINGS, RANKING_COLUMNS, needs_snapshot, ranking_columns, rankings_from_row,
+    record_catalog_async, snapshot_recorded,
+)
+from metrics import timed_handler
+
+
+def get_teams(league: str, season: str = "2025/2026", client=None):
+    return get_catalog(league, season, client)
+
+
+def resolve_rankings(team_ids: list[str], client=None):
+    """
+    Fetch every team in a saved ranking with a single query.
+    Returns (teams, missing_ids): teams in the saved order, plus any IDs
+    that no longer match a row in the teams table. Returns (None, None) if
+    the query failed, so a lookup error isn't mistaken for stale IDs.
+    """
+    if not team_ids:
+        return [], []
+
+    by_id = team_catalog.find_teams(team_ids)
+    uncached = list(set(team_ids) - by_id.keys())
+    if uncached:
+        query = (client or supabase).table("teams").select("*").in_("id", uncached)
+        res = safe_execute(query, f"resolve_rankings for {len(uncached)} teams")
+        if res is None:
+            return None, None
+        by_id.update({team["id"]: team for team in res.data})
+
+    return _order_by_ids(team_ids, by_id)
+
+
+def _order_by_ids(team_ids, by_id):
+    teams = [by_id[team_id] for team_id in team_ids if team_id in by_id]
+    missing_ids = [team_id for team_id in team_ids if team_id not in by_id]
+    if missing_ids:
+        print(f"⚠️ resolve_rankings: {len(missing_ids)} stale team IDs: {missing_ids}")
+
+    return teams, missing_ids
+
+
+# --- Async data access (async Supabase client) ---
+async def get_teams_async(client, league: str, season: str = "2025/2026"):
+    async def fetch():
+        query = (
+            client.table("teams")
+            .select("*")
+            .eq("league", league)
+            .eq("season", season)
+            .order("sort_order")
+        )
+
+        res = await safe_execute_async(query, f"get_teams for {league} {season}")
+        return res.data if res else []
+
+    return await team_catalog.get_async(league, season, fetch)
+
+
+async def resolve_rankings_async(client, team_ids: list[str]):
+    """Async version of resolve_rankings."""
+    if not team_ids:
+        return [], []
 
+    by_id = team_catalog.find_teams(team_ids)
+    uncached = list(set(team_ids) - by_id.keys())
+    if uncached:
+        query = client.table("teams").select("*").in_("id", uncached)
+        res = await safe_execute_async(query, f"resolve_rankings for {len(uncached)} teams")
+        if res is None:
+            return None, None
+        by_id.update({team["id"]: team for team in res.data})
 
-def get_teams(league: str, season: str = "2025/2026"):
+    return _order_by_ids(team_ids, by_id)
+
+
+async def load_saved_rankings(client, user_id: str, league: str, season: str):
+    """
+    Returns the user's saved prediction row (ranking columns only), or None
+    if there is none; decode it with ranking_codec.rankings_from_row.
+    """
     query = (
-        supabase.table("teams")
-        .select("*")
+        client.table("predictions")
+        .select(RANKING_COLUMNS)
+        .eq("user_id", user_id)
         .eq("league", league)
         .eq("season", season)
-        .order("sort_order")
     )
 
-    res = safe_execute(query, f"get_teams for {league} {season}")
-    return res.data if res else []
+    res = await safe_execute_async(query, f"load_teams prediction SELECT for {user_id}, {league}")
+    records = res.data if res else None
+    return records[0] if records else None
+
+
+async def save_rankings(client, user_id: str, league: str, season: str, rankings: list[str], now,
+                        catalog=None):
+    query = client.table("predictions").upsert(
+        {
+            "user_id": user_id,
+            "league": league,
+            "season": season,
+            **ranking_columns(rankings, catalog),
+            "updated_at": now.isoformat(),
+        },
+        on_conflict="user_id,league,season",
+    )
+
+    return await safe_execute_async(query, f"save_prediction for {league} by user {user_id}")
 
 
 def efl_1_to_24s_view(page: ft.Page, user_id: str, on_logout):
@@ -27,8 +127,10 @@ def efl_1_to_24s_view(page: ft.Page, user_id: str, on_logout):
     page.scroll = "auto"
     page.padding = 20
 
-    team_list = []  # Stores team data in current order
-    last_saved_ids = []  # store saved order of team UUIDs
+    # Per-league state, keyed like "league_one":
+    # {"catalog": [...], "team_list": [...], "last_saved_ids": [...], "dirty_count": int, "rows": [...]}
+    # dirty_count is the number of positions where team_list differs from last_saved_ids
+    leagues = {}
 
     list_view = ft.ReorderableListView(
         on_reorder=lambda e: handle_reorder(e),
@@ -42,36 +144,42 @@ def efl_1_to_24s_view(page: ft.Page, user_id: str, on_logout):
         color=ft.Colors.RED,
     )
 
-    async def update_countdown():
-        while True:
-            now = datetime.now(timezone.utc)
-            if now >= deadline:
-                countdown_text.value = "🚫 Deadline passed – predictions locked!"
-                countdown_text.color = ft.Colors.GREY
-                save_button.disabled = True
-                page.update()
-                break
-
-            remaining = deadline - now
-            total_seconds = int(remaining.total_seconds())
-            days, remainder = divmod(total_seconds, 86400)
-            hours, remainder = divmod(remainder, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            countdown_text.value = (
-                f"⏳ Time left: {days}d {hours:02}h {minutes:02}m {seconds:02}s"
-            )
-            page.update()
-            await asyncio.sleep(1)
+    def on_countdown_tick(text, locked):
+        countdown_text.value = text
+        if locked:
+            countdown_text.color = ft.Colors.GREY
+            save_button.disabled = True
+            if save_button.page:
+                save_button.update()
+        if countdown_text.page:
+            countdown_text.update()
+
+    def league_key(name):
+        return name.lower().replace(" ", "_")
+
+    def selected_key():
+        return league_key(tabs.tabs[tabs.selected_index].text)
+
+    async def data_client():
+        """Async client for this session with a valid token applied."""
+        await asyncio.to_thread(apply_saved_token, page)
+        return await async_session_client(page, get_token_manager(page).access_token)
+
+    async def hide_save_status():
+        await asyncio.sleep(2)
+        save_status_icon.visible = False
+        page.update()
 
+    @timed_handler("1to24s.save_prediction")
     async def save_prediction(e):
-        league = tabs.tabs[tabs.selected_index].text.lower().replace(" ", "_")
+        league = selected_key()
+        state = leagues.get(league)
+        if not state:
+            return
         season = "2025/2026"
-        rankings = [team["id"] for team in team_list]
+        rankings = [team["id"] for team in state["team_list"]]
         now = datetime.now(timezone.utc)
 
-        # 🔐 Ensure PostgREST has the correct token
-        apply_saved_token()
-
         # ✅ Block saving if deadline passed
         if now > deadline:
             page.snack_bar = ft.SnackBar(
@@ -81,29 +189,45 @@ def efl_1_to_24s_view(page: ft.Page, user_id: str, on_logout):
             page.update()
             return
 
-        query = supabase.table("predictions").upsert(
-            {
-                "user_id": user_id,
-                "league": league,
-                "season": season,
-                "rankings": rankings,
-                "updated_at": now.isoformat(),
-            },
-            on_conflict="user_id,league,season",
-        )
-
-        response = safe_execute(query, f"save_prediction for {league} by user {user_id}")
+        if COMPACT_RANKINGS and state["catalog"] and not snapshot_recorded(state["catalog"]):
+            # Positions are only readable after a catalog change through its snapshot
+            await record_catalog_async(state["catalog"], await data_client())
+
+        if save_queue:
+            # The queue writes with the service role, past RLS: only ever
+            # under the user of a freshly validated token
+            token_user_id = await asyncio.to_thread(apply_saved_token, page)
+            if not token_user_id or token_user_id != user_id:
+                page.snack_bar = ft.SnackBar(ft.Text("🔒 Your session has expired – please log in again."))
+                page.snack_bar.open = True
+                page.update()
+                return
+            # Stamped with `now`, so it counts even if the write lands after the deadline
+            saved = await save_queue.submit(token_user_id, league, season, rankings, now, state["catalog"])
+        else:
+            # 🔐 Ensure PostgREST has the correct token
+            client = await data_client()
+            response = await save_rankings(client, user_id, league, season, rankings, now, state["catalog"])
+            saved = bool(response and response.data)
 
-        if response and response.data:
+        if saved:
             page.snack_bar = ft.SnackBar(ft.Text("✅ Prediction saved!"))
-            last_saved_ids.clear()
-            last_saved_ids.extend(rankings)
-            save_button.disabled = True
+            record_save(league, season, user_id, rankings)
+            consensus_tables.record_save(league, season, user_id, rankings)
+            state["last_saved_ids"] = rankings
+            state["dirty_count"] = sum(
+                team["id"] != team_id for team, team_id in zip(state["team_list"], rankings)
+            )
+            save_button.disabled = state["dirty_count"] == 0
             save_status_icon.visible = True
             page.update()
-
-            await asyncio.sleep(2)
-            save_status_icon.visible = False
+            # Outside the handler, so the save's timing doesn't include the tick
+            page.run_task(hide_save_status)
+        elif save_queue and saved is False:
+            page.snack_bar = ft.SnackBar(
+                ft.Text("⏳ Saving is delayed – your prediction is queued and will be retried.")
+            )
+            page.snack_bar.open = True
             page.update()
         else:
             page.snack_bar = ft.SnackBar(ft.Text("❌ Failed to save prediction."))
@@ -118,18 +242,33 @@ def efl_1_to_24s_view(page: ft.Page, user_id: str, on_logout):
         name=ft.Icons.CHECK_CIRCLE, color=ft.Colors.GREEN, visible=False
     )
 
+    @timed_handler("1to24s.reorder")
     def handle_reorder(e):
-        item = team_list.pop(e.old_index)
-        team_list.insert(e.new_index, item)
+        state = leagues.get(selected_key())
+        if not state:
+            return
+        team_list = state["team_list"]
+        last_saved_ids = state["last_saved_ids"]
+
+        def is_moved(i):
+            return i >= len(last_saved_ids) or team_list[i]["id"] != last_saved_ids[i]
 
-        list_view.controls.clear()
-        for i, team in enumerate(team_list):
-            list_view.controls.append(team_container(team, i + 1))
+        # Only rows between the two indexes change position
+        lo, hi = sorted((e.old_index, e.new_index))
+        state["dirty_count"] -= sum(is_moved(i) for i in range(lo, hi + 1))
 
-        current_ids = [team["id"] for team in team_list]
-        save_button.disabled = current_ids == last_saved_ids
+        team_list.insert(e.new_index, team_list.pop(e.old_index))
+        list_view.controls.insert(e.new_index, list_view.controls.pop(e.old_index))
+
+        for i in range(lo, hi + 1):
+            list_view.controls[i].content.controls[0].value = f"{i + 1}."
+        state["dirty_count"] += sum(is_moved(i) for i in range(lo, hi + 1))
+
+        save_button.disabled = state["dirty_count"] == 0
         save_status_icon.visible = False
-        page.update()
+        list_view.update()
+        save_button.update()
+        save_status_icon.update()
 
     def team_container(team, position):
         return ft.Container(
@@ -151,61 +290,92 @@ def efl_1_to_24s_view(page: ft.Page, user_id: str, on_logout):
             width=350,
         )
 
-    def load_teams(league):
-        nonlocal team_list
-
-        apply_saved_token()
+    def show_league(league):
+        """Swap the list to a league's cached rows; no network involved."""
+        state = leagues.get(league)
+        list_view.controls = state["rows"] if state else []
+        if state:
+            # The setter copies; keep one list so reorders update the cached rows
+            state["rows"] = list_view.controls
+        save_button.disabled = (
+            not state or state["dirty_count"] == 0 or datetime.now(timezone.utc) >= deadline
+        )
+        save_status_icon.visible = False
+        page.update()
 
+    async def load_teams(client, league, force=False):
         season = "2025/2026"
-        league = league.lower().replace(" ", "_")
+        if force:
+            team_catalog.invalidate(league, season)
 
-        prediction_query = (
-            supabase.table("predictions")
-            .select("rankings")
-            .eq("user_id", user_id)
-            .eq("league", league)
-            .eq("season", season)
-        )
-
-        prediction_res = safe_execute(
-            prediction_query, f"load_teams prediction SELECT for {user_id}, {league}"
+        # Saved prediction and league catalog are independent: fetch together
+        saved, catalog = await asyncio.gather(
+            load_saved_rankings(client, user_id, league, season),
+            get_teams_async(client, league, season),
         )
-        records = prediction_res.data if prediction_res else None
 
-        if records and records[0]["rankings"]:
-            saved_order_ids = records[0]["rankings"]
-            team_list = []
-
-            for team_id in saved_order_ids:
-                team_query = (
-                    supabase.table("teams").select("*").eq("id", team_id).maybe_single()
+        if needs_snapshot(saved, catalog):
+            saved_order_ids = await asyncio.to_thread(rankings_from_row, saved, catalog)
+        else:
+            saved_order_ids = rankings_from_row(saved, catalog)
+        added = []
+        if saved_order_ids:
+            team_list, missing_ids = await resolve_rankings_async(client, saved_order_ids)
+            if team_list is None:
+                # Don't show (or let the user save) a ranking rebuilt from a failed lookup
+                leagues.pop(league, None)
+                name = league.replace("_", " ").title()
+                page.snack_bar = ft.SnackBar(
+                    ft.Text(f"❌ Couldn't load your saved {name} ranking – press refresh to try again.")
                 )
-                res = safe_execute(team_query, f"load_teams fetch team {team_id}")
-                if res and res.data:
-                    team_list.append(res.data)
+                page.snack_bar.open = True
+                if league == selected_key():
+                    show_league(league)
+                else:
+                    page.update()
+                return
+            # Teams the saved ranking no longer covers (stale IDs) go at the bottom
+            placed = {team["id"] for team in team_list}
+            added = [team for team in catalog if team["id"] not in placed]
+            team_list = team_list + added
+            last_saved_ids = saved_order_ids
         else:
-            fallback_query = (
-                supabase.table("teams")
-                .select("*")
-                .eq("league", league)
-                .eq("season", season)
-                .order("sort_order")
+            team_list = catalog
+            last_saved_ids = [team["id"] for team in catalog]
+
+        leagues[league] = {
+            "catalog": catalog,
+            "team_list": team_list,
+            "last_saved_ids": last_saved_ids,
+            # Non-zero when teams were added, so the completed ranking can be saved
+            "dirty_count": sum(
+                i >= len(last_saved_ids) or team["id"] != last_saved_ids[i]
+                for i, team in enumerate(team_list)
+            ),
+            "rows": [team_container(team, i + 1) for i, team in enumerate(team_list)],
+        }
+        if added or (saved_order_ids and missing_ids):
+            name = league.replace("_", " ").title()
+            page.snack_bar = ft.SnackBar(
+                ft.Text(f"⚠️ Your saved {name} ranking referred to teams that have changed. "
+                        f"{len(added)} team(s) were added at the bottom – please check and save.")
             )
-            fallback_res = safe_execute(fallback_query, f"load_teams fallback for {league}")
-            team_list = fallback_res.data if fallback_res else []
+            page.snack_bar.open = True
+            page.update()
+        if league == selected_key():
+            show_league(league)
 
-        list_view.controls.clear()
-        for i, team in enumerate(team_list):
-            list_view.controls.append(team_container(team, i + 1))
+    async def prefetch_leagues():
+        client = await data_client()
+        await asyncio.gather(*(load_teams(client, league_key(tab.text)) for tab in tabs.tabs))
 
-        page.update()
-
-        last_saved_ids.clear()
-        last_saved_ids.extend([team["id"] for team in team_list])
+    async def refresh_league():
+        client = await data_client()
+        await load_teams(client, selected_key(), force=True)
 
+    @timed_handler("1to24s.tab_change")
     def on_tab_change(e):
-        selected_league = e.control.tabs[e.control.selected_index].text
-        load_teams(selected_league)
+        show_league(selected_key())
 
     tabs = ft.Tabs(
         selected_index=0,
@@ -217,6 +387,12 @@ def efl_1_to_24s_view(page: ft.Page, user_id: str, on_logout):
         ],
     )
 
+    refresh_button = ft.IconButton(
+        icon=ft.Icons.REFRESH,
+        tooltip="Reload from server (discards unsaved changes)",
+        on_click=lambda e: run_for_route(page, refresh_league, scope="/1to24s"),
+    )
+
     # --- Main Layout ---
     build_view = ft.Column(
         controls=[
@@ -224,6 +400,7 @@ def efl_1_to_24s_view(page: ft.Page, user_id: str, on_logout):
             ft.Row(
                 [
                     ft.Text("EFL 1 to 24s", size=24, weight=ft.FontWeight.BOLD),
+                    refresh_button,
                 ],
                 alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
             ),
@@ -233,10 +410,11 @@ def efl_1_to_24s_view(page: ft.Page, user_id: str, on_logout):
         ],
         spacing=20,
         expand=True,
+        # The countdown only runs while the view is on screen
+        data={"on_show": lambda: run_for_route(page, countdown.follow, on_countdown_tick)},
     )
 
     # --- Initialize view ---
-    load_teams("championship")
-    page.run_task(update_countdown)
+    run_for_route(page, prefetch_leagues, scope="/1to24s")
 
     return build_view
@@ -0,0 +1,143 @@
+"""
+Stream the predictions table to CSV or newline-delimited JSON.
+
+    python src/export_predictions.py --out predictions.ndjson
+    python src/export_predictions.py --format csv --out predictions.csv --checkpoint export.ckpt
+
+Rows are paged by the (league, season, user_id) key rather than by offset,
+so memory stays flat and a run can resume from its last checkpointed cursor.
+"""
+import argparse
+import csv
+import json
+import time
+from pathlib import Path
+from supabase_client import supabase
+from supabase_helpers import safe_execute
+
+PAGE_SIZE = 1000
+PAGE_RETRIES = 3
+KEY_COLUMNS = ("league", "season", "user_id")
+
+
+def _after_cursor(cursor: tuple) -> str:
+    """PostgREST `or` filter for rows strictly after (league, season, user_id)."""
+    league, season, user_id = (json.dumps(value) for value in cursor)
+    return (
+        f"league.gt.{league},"
+        f"and(league.eq.{league},season.gt.{season}),"
+        f"and(league.eq.{league},season.eq.{season},user_id.gt.{user_id})"
+    )
+
+
+def fetch_page(cursor=None, league=None, season=None, columns="*",
+               page_size=PAGE_SIZE, client=None, retries=PAGE_RETRIES):
+    """Fetch one keyset page, retrying with backoff. Returns the rows (None if all attempts fail)."""
+    client = client or supabase
+    for attempt in range(retries):
+        query = client.table("predictions").select(columns)
+        if league:
+            query = query.eq("league", league)
+        if season:
+            query = query.eq("season", season)
+        if cursor:
+            query = query.or_(_after_cursor(cursor))
+        query = query.order("league").order("season").order("user_id").limit(page_size)
+
+        res = safe_execute(query, f"export predictions page after {cursor} (attempt {attempt + 1})")
+        if res is not None:
+            return res.data
+        if attempt < retries - 1:
+            time.sleep(2 ** attempt)
+    return None
+
+
+def stream_predictions(league=None, season=None, cursor=None, columns="*",
+                       page_size=PAGE_SIZE, client=None, on_page=None):
+    """
+    Yield prediction rows in key order, one page in memory at a time.
+    on_page(cursor) is called after each page has been yielded, with the
+    key of its last row, so callers can checkpoint.
+    """
+    if columns != "*":
+        # The cursor needs the key columns
+        columns = ",".join(dict.fromkeys([*KEY_COLUMNS, *(c.strip() for c in columns.split(","))]))
+
+    while True:
+        rows = fetch_page(cursor, league, season, columns, page_size, client)
+        if rows is None:
+            raise RuntimeError(f"Giving up on predictions page after {cursor}")
+
+        yield from rows
+        if rows:
+            cursor = tuple(rows[-1][key] for key in KEY_COLUMNS)
+            if on_page:
+                on_page(cursor)
+        if len(rows) < page_size:
+            return
+
+
+def export(out: Path, fmt: str = "ndjson", checkpoint: Path | None = None,
+           league=None, season=None, client=None) -> int:
+    """
+    Write predictions to `out`, resuming from `checkpoint` if it exists. Returns rows written.
+    Raises ValueError if the checkpoint was written by a run with other filters or format.
+    """
+    run = {"league": league, "season": season, "format": fmt}
+    cursor, size = None, 0
+    if checkpoint and checkpoint.exists():
+        saved = json.loads(checkpoint.read_text())
+        stored = {key: saved.get(key) for key in run}
+        if stored != run:
+            raise ValueError(f"{checkpoint} is for another export ({stored}); rerun with the same options or delete it")
+        if not out.exists() or out.stat().st_size < saved["size"]:
+            print(f"⚠️ {out} is missing or shorter than {checkpoint} expects; starting over")
+        else:
+            cursor, size = tuple(saved["cursor"]), saved["size"]
+            print(f"↪️ Resuming export after {cursor}")
+
+    written = 0
+    with out.open("r+" if cursor else "w", newline="") as f:
+        # Drop anything written after the last complete page
+        f.seek(size)
+        f.truncate()
+
+        def save_checkpoint(page_cursor):
+            f.flush()
+            if checkpoint:
+                checkpoint.write_text(json.dumps({**run, "cursor": page_cursor, "size": f.tell()}))
+
+        writer = None
+        for row in stream_predictions(league, season, cursor, client=client, on_page=save_checkpoint):
+            if fmt == "csv":
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(row))
+                    if not cursor:
+                        writer.writeheader()
+                writer.writerow({
+                    **row,
+                    **{column: json.dumps(row[column]) for column in ("rankings", "positions") if column in row},
+                })
+            else:
+                f.write(json.dumps(row) + "\n")
+            written += 1
+
+    if checkpoint:
+        checkpoint.unlink(missing_ok=True)
+    print(f"✅ Exported {written} predictions to {out}")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the predictions table.")
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--checkpoint", type=Path)
+    parser.add_argument("--league")
+    parser.add_argument("--season")
+    args = parser.parse_args()
+
+    try:
+        export(args.out, args.format, args.checkpoint, args.league, args.season)
+    except ValueError as ex:
+        raise SystemExit(f"❌ {ex}")
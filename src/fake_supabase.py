@@ -0,0 +1,361 @@
+"""
+In-memory stand-in for the Supabase REST (PostgREST) and Auth (GoTrue)
+endpoints the app uses, for benchmarks and load tests. It speaks enough of
+both protocols for the real supabase client to talk to it over HTTP.
+
+Every request sleeps for `latency` seconds first, to stand in for the
+round trip to the hosted project, and is counted per endpoint. Writes are
+reported to change_listeners like Realtime row changes, e.g. to a
+change_feed.LocalChangeSource's publish().
+
+    fake = FakeSupabase(latency=0.02).start()
+    os.environ["SUPABASE_URL"] = fake.url   # before importing supabase_client
+"""
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+import jwt
+
+FAKE_JWT_SECRET = "fake-super-secret-jwt-token-for-local-benchmarks"
+FAKE_ANON_KEY = "fake-anon-key"
+# Any key is accepted; this one stands in for the service role key
+FAKE_SERVICE_KEY = "fake-service-key"
+ACCESS_TOKEN_TTL_SECONDS = 3600
+LEAGUES = ("championship", "league_one", "league_two")
+SEASON = "2025/2026"
+
+# Query parameters that are not column filters
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def seed_teams(season: str = SEASON, per_league: int = 24) -> list[dict]:
+    """A `teams` catalog with per_league teams in each league."""
+    return [
+        {
+            "id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"{league}/{season}/{i}")),
+            "name": f"{league.replace('_', ' ').title()} Team {i + 1}",
+            "league": league,
+            "season": season,
+            "sort_order": i + 1,
+        }
+        for league in LEAGUES
+        for i in range(per_league)
+    ]
+
+
+def _coerce(row_value, raw: str):
+    if isinstance(row_value, bool):
+        return raw == "true"
+    if isinstance(row_value, (int, float)):
+        return float(raw)
+    return raw
+
+
+def _strip_quotes(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _matches(row: dict, column: str, expr: str) -> bool:
+    op, _, raw = expr.partition(".")
+    value = row.get(column)
+    if op == "is":
+        return value is None if raw == "null" else value == (raw == "true")
+    if value is None:
+        return False
+    if op == "in":
+        options = {_strip_quotes(v.strip()) for v in raw.strip("()").split(",") if v.strip()}
+        return str(value) in options
+    raw = _strip_quotes(raw)
+    other = _coerce(value, raw)
+    if op == "eq":
+        return value == other
+    if op == "neq":
+        return value != other
+    if op == "gt":
+        return value > other
+    if op == "gte":
+        return value >= other
+    if op == "lt":
+        return value < other
+    if op == "lte":
+        return value <= other
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def _order(rows: list[dict], spec: str) -> list[dict]:
+    # Apply the least significant key first; sorts are stable
+    for part in reversed(spec.split(",")):
+        column, *flags = part.strip().split(".")
+        desc = "desc" in flags
+        rows = sorted(
+            rows,
+            key=lambda r: (r.get(column) is None, r.get(column) if r.get(column) is not None else 0),
+            reverse=desc,
+        )
+    return rows
+
+
+def _project(row: dict, select: str) -> dict:
+    columns = [c.strip() for c in select.split(",") if c.strip()]
+    if not columns or "*" in columns:
+        return dict(row)
+    return {c: row.get(c) for c in columns}
+
+
+class FakeSupabase:
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0,
+                 jwt_secret: str = FAKE_JWT_SECRET):
+        self.latency = latency
+        self.jwt_secret = jwt_secret
+        self.tables = {"teams": seed_teams(), "predictions": []}
+        self.primary_keys = {"predictions": ("user_id", "league", "season"), "catalog_versions": ("version",)}
+        self.users = {}           # email -> {"user": {...}, "password": str}
+        self.refresh_tokens = {}  # refresh token -> email
+        self.requests = Counter()
+        self.change_listeners = []  # listener(table, type, record, old_record)
+        self.data_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeSupabase":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-supabase", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # --- Test data ---
+    def add_user(self, email: str, password: str, display_name: str | None = None) -> dict:
+        user = {
+            "id": str(uuid.uuid4()),
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": email,
+            "app_metadata": {"provider": "email"},
+            "user_metadata": {"display_name": display_name} if display_name else {},
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with self.data_lock:
+            self.users[email] = {"user": user, "password": password}
+        return user
+
+    def round_trips(self) -> dict:
+        return dict(self.requests)
+
+    def reset_counts(self):
+        self.requests.clear()
+
+    def _changed(self, table: str, type: str, record: dict | None, old_record: dict | None = None):
+        for listener in self.change_listeners:
+            listener(table, type, dict(record or {}), dict(old_record or {}))
+
+    # --- Auth ---
+    def _issue_session(self, email: str) -> dict:
+        user = self.users[email]["user"]
+        now = int(time.time())
+        access_token = jwt.encode(
+            {
+                "sub": user["id"],
+                "email": email,
+                "aud": "authenticated",
+                "role": "authenticated",
+                "app_metadata": user["app_metadata"],
+                "user_metadata": user["user_metadata"],
+                "iat": now,
+                "exp": now + ACCESS_TOKEN_TTL_SECONDS,
+                "session_id": str(uuid.uuid4()),
+            },
+            self.jwt_secret,
+            algorithm="HS256",
+        )
+        refresh_token = uuid.uuid4().hex
+        self.refresh_tokens[refresh_token] = email
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "expires_in": ACCESS_TOKEN_TTL_SECONDS,
+            "expires_at": now + ACCESS_TOKEN_TTL_SECONDS,
+            "refresh_token": refresh_token,
+            "user": user,
+        }
+
+    def _user_for_token(self, authorization: str | None) -> dict | None:
+        token = (authorization or "").removeprefix("Bearer ").strip()
+        try:
+            claims = jwt.decode(token, self.jwt_secret, algorithms=["HS256"], audience="authenticated")
+        except jwt.PyJWTError:
+            return None
+        return next((u["user"] for u in self.users.values() if u["user"]["id"] == claims["sub"]), None)
+
+    def auth(self, method: str, path: str, params: dict, body, headers) -> tuple[int, object]:
+        invalid = (400, {"code": 400, "error_code": "invalid_credentials", "msg": "Invalid login credentials"})
+        with self.data_lock:
+            if path == "token" and params.get("grant_type") == "password":
+                account = self.users.get(body.get("email"))
+                if not account or account["password"] != body.get("password"):
+                    return invalid
+                return 200, self._issue_session(body["email"])
+            if path == "token" and params.get("grant_type") == "refresh_token":
+                email = self.refresh_tokens.pop(body.get("refresh_token"), None)
+                if not email:
+                    return 400, {"code": 400, "error_code": "refresh_token_not_found", "msg": "Invalid Refresh Token"}
+                return 200, self._issue_session(email)
+            if path == "signup":
+                if body.get("email") in self.users:
+                    return 422, {"code": 422, "error_code": "user_already_exists", "msg": "User already registered"}
+        if path == "signup":
+            self.add_user(body["email"], body["password"])
+            with self.data_lock:
+                return 200, self._issue_session(body["email"])
+        if path == "recover":
+            return 200, {}
+        if path == "logout":
+            return 204, None
+        if path == "user":
+            with self.data_lock:
+                user = self._user_for_token(headers.get("Authorization"))
+                if not user:
+                    return 401, {"code": 401, "error_code": "bad_jwt", "msg": "invalid JWT"}
+                if method == "PUT":
+                    if "data" in body:
+                        user["user_metadata"].update(body["data"] or {})
+                    if "password" in body:
+                        self.users[user["email"]]["password"] = body["password"]
+                return 200, user
+        return 404, {"code": 404, "msg": f"Unsupported auth endpoint: {method} {path}"}
+
+    # --- REST ---
+    def rest(self, method: str, table: str, params: list, body, prefer: str) -> tuple[int, object]:
+        query = dict(p for p in params if p[0] in RESERVED_PARAMS)
+        filters = [p for p in params if p[0] not in RESERVED_PARAMS]
+
+        with self.data_lock:
+            rows = self.tables.setdefault(table, [])
+            if method == "GET":
+                result = [r for r in rows if all(_matches(r, c, e) for c, e in filters)]
+                if "order" in query:
+                    result = _order(result, query["order"])
+                offset = int(query.get("offset", 0))
+                if "limit" in query:
+                    result = result[offset:offset + int(query["limit"])]
+                elif offset:
+                    result = result[offset:]
+                return 200, [_project(r, query.get("select", "*")) for r in result]
+
+            if method == "POST":
+                new_rows = body if isinstance(body, list) else [body]
+                conflict = query.get("on_conflict")
+                keys = tuple(c.strip() for c in conflict.split(",")) if conflict else self.primary_keys.get(table, ("id",))
+                merge = "resolution=merge-duplicates" in prefer
+                ignore = "resolution=ignore-duplicates" in prefer
+                index = {tuple(r.get(k) for k in keys): r for r in rows} if merge or ignore else {}
+                written = []
+                for new in new_rows:
+                    existing = index.get(tuple(new.get(k) for k in keys))
+                    if existing is not None and ignore:
+                        continue
+                    if existing is not None:
+                        old = dict(existing)
+                        existing.update(new)
+                        written.append(existing)
+                        self._changed(table, "UPDATE", existing, old)
+                    else:
+                        row = {"id": str(uuid.uuid4()), **new} if "id" not in new and keys == ("id",) else dict(new)
+                        rows.append(row)
+                        index[tuple(row.get(k) for k in keys)] = row
+                        written.append(row)
+                        self._changed(table, "INSERT", row)
+                result = written
+
+            elif method == "PATCH":
+                result = [r for r in rows if all(_matches(r, c, e) for c, e in filters)]
+                for r in result:
+                    old = dict(r)
+                    r.update(body)
+                    self._changed(table, "UPDATE", r, old)
+
+            elif method == "DELETE":
+                result = [r for r in rows if all(_matches(r, c, e) for c, e in filters)]
+                self.tables[table] = [r for r in rows if r not in result]
+                for r in result:
+                    self._changed(table, "DELETE", None, r)
+
+            else:
+                return 405, {"message": f"Unsupported method {method}"}
+
+            if "return=representation" not in prefer:
+                return 201 if method == "POST" else 204, None
+            return 201 if method == "POST" else 200, [dict(r) for r in result]
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the hosted API
+
+            def _dispatch(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                parts = urlsplit(self.path)
+                params = parse_qsl(parts.query, keep_blank_values=True)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+
+                segments = parts.path.strip("/").split("/")
+                if segments[:2] == ["rest", "v1"] and len(segments) == 3:
+                    fake.requests[f"{self.command} rest/{segments[2]}"] += 1
+                    status, payload = fake.rest(self.command, segments[2], params, body,
+                                                self.headers.get("Prefer", ""))
+                elif parts.path == "/auth/v1/.well-known/jwks.json":
+                    # HS256 only; signing keys are not published
+                    fake.requests["GET auth/jwks"] += 1
+                    status, payload = 200, {"keys": []}
+                elif segments[:2] == ["auth", "v1"] and len(segments) == 3:
+                    fake.requests[f"{self.command} auth/{segments[2]}"] += 1
+                    status, payload = fake.auth(self.command, segments[2], dict(params), body, self.headers)
+                else:
+                    status, payload = 404, {"message": f"Not found: {parts.path}"}
+
+                data = b"" if payload is None else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the in-memory Supabase stand-in.")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every request")
+    args = parser.parse_args()
+
+    fake = FakeSupabase(latency=args.latency, port=args.port)
+    print(f"🧪 Fake Supabase on {fake.url} (anon key: {FAKE_ANON_KEY})")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
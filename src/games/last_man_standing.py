@@ -0,0 +1,186 @@
+"""
+Last Man Standing: each round every surviving player picks one team to win;
+a team can only be used once per season, and must have a fixture that
+round. A draw, a loss or a pick with no fixture eliminates.
+
+Tables used:
+    lms_entries  (user_id, season, alive, used_team_ids, eliminated_round)
+    lms_picks    (user_id, season, round, team_id)
+    fixtures     (season, round, home_team_id, away_team_id, home_goals, away_goals)
+"""
+from supabase_client import supabase
+from supabase_helpers import safe_execute
+
+PAGE_SIZE = 1000
+UPSERT_BATCH_SIZE = 1000
+
+
+class LastManStanding:
+    """In-memory game state for one season: who is alive and which teams each player has used."""
+
+    def __init__(self, season: str, entries: list[dict]):
+        self.season = season
+        self.used = {e["user_id"]: set(e.get("used_team_ids") or []) for e in entries}
+        self.alive = {e["user_id"] for e in entries if e.get("alive", True)}
+        self.eliminated_round = {
+            e["user_id"]: e["eliminated_round"] for e in entries if e.get("eliminated_round")
+        }
+
+    def join(self, user_id: str):
+        self.used.setdefault(user_id, set())
+        self.alive.add(user_id)
+
+    def validate_pick(self, user_id: str, team_id: str, fixtures: list[dict] | None = None) -> str | None:
+        """
+        Returns an error message, or None if the pick is allowed. When the
+        round's fixtures are known, the team must be playing in one.
+        """
+        if user_id not in self.alive:
+            return "You have been eliminated."
+        if team_id in self.used[user_id]:
+            return "You have already used this team."
+        if fixtures and team_id not in team_results(fixtures):
+            return "This team has no fixture this round."
+        return None
+
+    def resolve_round(self, round_no: int, picks: list[dict], fixtures: list[dict]):
+        """
+        Resolve one round in a single pass over all picks.
+        Alive players with no pick, whose team drew or lost, or whose team
+        had no fixture this round are eliminated; a pick on an unplayed
+        (postponed) fixture survives.
+        Returns (survivors, eliminated) as lists of user IDs.
+        """
+        results = team_results(fixtures)
+        picked = {p["user_id"]: p["team_id"] for p in picks}
+
+        survivors, eliminated = [], []
+        for user_id in self.alive:
+            team_id = picked.get(user_id)
+            # No fixture is a loss; None (postponed) is not
+            result = results.get(team_id, "L") if team_id else "L"
+            if team_id:
+                self.used[user_id].add(team_id)
+            if result in ("W", None):
+                survivors.append(user_id)
+            else:
+                eliminated.append(user_id)
+                self.eliminated_round[user_id] = round_no
+
+        self.alive.difference_update(eliminated)
+        return survivors, eliminated
+
+    def entry_rows(self, user_ids) -> list[dict]:
+        """lms_entries rows for the given players, ready to upsert."""
+        return [
+            {
+                "user_id": user_id,
+                "season": self.season,
+                "alive": user_id in self.alive,
+                "used_team_ids": sorted(self.used[user_id]),
+                "eliminated_round": self.eliminated_round.get(user_id),
+            }
+            for user_id in user_ids
+        ]
+
+
+def team_results(fixtures: list[dict]) -> dict:
+    """Maps team ID to "W", "D" or "L"; None when the fixture has no score yet."""
+    results = {}
+    for f in fixtures:
+        home, away = f["home_goals"], f["away_goals"]
+        if home is None or away is None:
+            results[f["home_team_id"]] = results[f["away_team_id"]] = None
+        elif home == away:
+            results[f["home_team_id"]] = results[f["away_team_id"]] = "D"
+        else:
+            results[f["home_team_id"]] = "W" if home > away else "L"
+            results[f["away_team_id"]] = "W" if away > home else "L"
+    return results
+
+
+# --- Database access ---
+def _select_all(table: str, columns: str, filters: dict, client=None) -> list[dict]:
+    """Read every matching row, keyset-paged on user_id."""
+    client = client or supabase
+    rows, last = [], None
+    while True:
+        query = client.table(table).select(columns)
+        for column, value in filters.items():
+            query = query.eq(column, value)
+        if last:
+            query = query.gt("user_id", last)
+        res = safe_execute(query.order("user_id").limit(PAGE_SIZE), f"{table} page after {last}")
+        if res is None:
+            raise RuntimeError(f"Could not read {table} after {last}")
+        rows.extend(res.data)
+        if len(res.data) < PAGE_SIZE:
+            return rows
+        last = res.data[-1]["user_id"]
+
+
+def load_game(season: str, client=None) -> LastManStanding:
+    entries = _select_all(
+        "lms_entries", "user_id, alive, used_team_ids, eliminated_round", {"season": season}, client
+    )
+    return LastManStanding(season, entries)
+
+
+def load_fixtures(season: str, round_no: int, client=None) -> list[dict]:
+    res = safe_execute(
+        (client or supabase).table("fixtures")
+        .select("home_team_id, away_team_id, home_goals, away_goals")
+        .eq("season", season)
+        .eq("round", round_no),
+        f"lms fixtures for round {round_no}",
+    )
+    if res is None:
+        raise RuntimeError(f"Could not load fixtures for round {round_no}")
+    return res.data
+
+
+def submit_pick(game: LastManStanding, user_id: str, round_no: int, team_id: str,
+                client=None, fixtures: list[dict] | None = None):
+    """
+    Validate a pick against the in-memory state and the round's fixtures
+    (loaded if not given) and store it. Returns an error message or None.
+    """
+    if fixtures is None:
+        fixtures = load_fixtures(game.season, round_no, client)
+    error = game.validate_pick(user_id, team_id, fixtures)
+    if error:
+        return error
+
+    query = (client or supabase).table("lms_picks").upsert(
+        {"user_id": user_id, "season": game.season, "round": round_no, "team_id": team_id},
+        on_conflict="user_id,season,round",
+    )
+    res = safe_execute(query, f"lms submit_pick for {user_id} round {round_no}")
+    return None if res and res.data else "Failed to save pick."
+
+
+def resolve_round(game: LastManStanding, round_no: int, client=None):
+    """
+    Load every pick and fixture for the round, resolve them in memory and
+    write all entries back in batched upserts. Returns (survivors, eliminated).
+    """
+    client = client or supabase
+    picks = _select_all("lms_picks", "user_id, team_id", {"season": game.season, "round": round_no}, client)
+
+    fixtures = load_fixtures(game.season, round_no, client)
+
+    alive_before = list(game.alive)
+    survivors, eliminated = game.resolve_round(round_no, picks, fixtures)
+
+    rows = game.entry_rows(alive_before)
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        res = safe_execute(
+            client.table("lms_entries").upsert(batch, on_conflict="user_id,season"),
+            f"lms resolve_round {round_no} batch {start // UPSERT_BATCH_SIZE}",
+        )
+        if res is None:
+            raise RuntimeError(f"Failed writing lms_entries batch starting at {start}")
+
+    print(f"✅ Round {round_no}: {len(survivors)} survived, {len(eliminated)} eliminated")
+    return survivors, eliminated
@@ -0,0 +1,124 @@
+"""
+Monte Carlo season simulator for the Season Prediction mode.
+
+Goals in each remaining fixture are drawn from Poisson distributions
+driven by per-team attack/defence ratings. Batches of seasons are simulated
+with numpy and spread across CPU cores with a process pool; the result is
+each team's probability of finishing in every position.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+BATCH_SIZE = 2000
+HOME_ADVANTAGE = 0.25
+BASE_GOAL_RATE = 0.3  # log of average goals per team per match (~1.35)
+
+
+def round_robin(team_ids: list[str]) -> list[tuple[str, str]]:
+    """Every home/away pairing, for simulating a season from the start."""
+    return [(home, away) for home in team_ids for away in team_ids if home != away]
+
+
+def _simulate_batch(n_seasons, seed, home_idx, away_idx, home_rate, away_rate,
+                    points, goal_diff, goals_for):
+    """Simulate n_seasons and return a (teams x positions) count matrix."""
+    rng = np.random.default_rng(seed)
+    n_teams = len(points)
+    n_fixtures = len(home_idx)
+
+    home_goals = rng.poisson(home_rate, size=(n_seasons, n_fixtures))
+    away_goals = rng.poisson(away_rate, size=(n_seasons, n_fixtures))
+    home_pts = np.where(home_goals > away_goals, 3, np.where(home_goals == away_goals, 1, 0))
+    away_pts = np.where(away_goals > home_goals, 3, np.where(home_goals == away_goals, 1, 0))
+    # Float matrices so the products below go through BLAS; values stay exact
+    home_goals, away_goals = home_goals.astype(np.float32), away_goals.astype(np.float32)
+    home_pts, away_pts = home_pts.astype(np.float32), away_pts.astype(np.float32)
+
+    # (fixtures x teams) incidence matrices turn per-fixture results into per-team totals
+    home_of = np.zeros((n_fixtures, n_teams), dtype=np.float32)
+    away_of = np.zeros((n_fixtures, n_teams), dtype=np.float32)
+    home_of[np.arange(n_fixtures), home_idx] = 1
+    away_of[np.arange(n_fixtures), away_idx] = 1
+
+    pts = points + home_pts @ home_of + away_pts @ away_of
+    gd = goal_diff + (home_goals - away_goals) @ (home_of - away_of)
+    gf = goals_for + home_goals @ home_of + away_goals @ away_of
+
+    # Order by points, goal difference, goals scored, then a random tiebreak
+    tiebreak = rng.random((n_seasons, n_teams))
+    order = np.lexsort((tiebreak, -gf, -gd, -pts), axis=1)
+
+    counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+    positions = np.broadcast_to(np.arange(n_teams), order.shape)
+    np.add.at(counts, (order.ravel(), positions.ravel()), 1)
+    return counts
+
+
+def simulate_season(teams: list[dict], ratings: dict, fixtures: list[tuple[str, str]] | None = None,
+                    table: dict | None = None, n_seasons: int = 20000,
+                    workers: int | None = None, seed: int | None = None) -> dict:
+    """
+    Simulate the rest of a season.
+
+    teams:    `teams` rows for one league/season (only "id" is used)
+    ratings:  {team_id: {"attack": float, "defence": float}}, 0 = league average
+    fixtures: remaining (home_id, away_id) pairs; the full season if omitted
+    table:    current {team_id: {"points", "goal_diff", "goals_for"}}
+
+    Returns {"team_ids": [...], "probabilities": (teams x positions) array}.
+    """
+    team_ids = [team["id"] for team in teams]
+    index = {team_id: i for i, team_id in enumerate(team_ids)}
+    fixtures = fixtures if fixtures is not None else round_robin(team_ids)
+    table = table or {}
+
+    home_idx = np.array([index[h] for h, _ in fixtures], dtype=np.int32)
+    away_idx = np.array([index[a] for _, a in fixtures], dtype=np.int32)
+    attack = np.array([ratings.get(t, {}).get("attack", 0.0) for t in team_ids])
+    defence = np.array([ratings.get(t, {}).get("defence", 0.0) for t in team_ids])
+    home_rate = np.exp(BASE_GOAL_RATE + HOME_ADVANTAGE + attack[home_idx] - defence[away_idx])
+    away_rate = np.exp(BASE_GOAL_RATE + attack[away_idx] - defence[home_idx])
+
+    def column(key):
+        return np.array([table.get(t, {}).get(key, 0) for t in team_ids], dtype=np.int32)
+
+    points, goal_diff, goals_for = column("points"), column("goal_diff"), column("goals_for")
+
+    batches = [BATCH_SIZE] * (n_seasons // BATCH_SIZE)
+    if n_seasons % BATCH_SIZE:
+        batches.append(n_seasons % BATCH_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    shared = (home_idx, away_idx, home_rate, away_rate, points, goal_diff, goals_for)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(batches) == 1:
+        results = [_simulate_batch(n, s, *shared) for n, s in zip(batches, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_simulate_batch, n, s, *shared) for n, s in zip(batches, seeds)]
+            results = [f.result() for f in futures]
+
+    counts = np.sum(results, axis=0)
+    return {"team_ids": team_ids, "probabilities": counts / n_seasons}
+
+
+def expected_score(simulation: dict, rankings: list[str]) -> float:
+    """
+    Expected 1to24s total absolute position error of a ranking
+    (team IDs, first place first) under the simulated distribution.
+    """
+    n_teams = len(simulation["team_ids"])
+    predicted = {team_id: p for p, team_id in enumerate(rankings)}
+    pred = np.array([predicted[t] for t in simulation["team_ids"]])
+    distance = np.abs(pred[:, None] - np.arange(n_teams)[None, :])
+    return float((simulation["probabilities"] * distance).sum())
+
+
+def finishing_odds(simulation: dict, position: int) -> dict:
+    """Decimal odds of each team finishing in a 1-based position (None if it never happened)."""
+    probs = simulation["probabilities"][:, position - 1]
+    return {
+        team_id: (round(1 / float(p), 2) if p > 0 else None)
+        for team_id, p in zip(simulation["team_ids"], probs)
+    }
@@ -0,0 +1,97 @@
+"""
+Snakes and Ladders: every player backs a team, and each round their counter
+moves by a roll derived from that team's result. Landing on a ladder foot
+or a snake head jumps the counter.
+
+State is kept in flat numpy arrays (one jump table for the board, one
+position and one team index per player) so a whole round resolves in a
+single vectorized pass.
+"""
+import numpy as np
+
+BOARD_SIZE = 100
+
+# start square -> end square (ladders go up, snakes go down)
+DEFAULT_JUMPS = {
+    4: 14, 9: 31, 21: 42, 28: 84, 36: 44, 51: 67, 71: 91, 80: 100,
+    16: 6, 47: 26, 49: 11, 56: 53, 62: 19, 64: 60, 87: 24, 93: 73, 95: 75, 98: 78,
+}
+
+
+def result_roll(goals_for: int, goals_against: int) -> int:
+    """Default roll: goals scored plus 3 for a win or 1 for a draw."""
+    bonus = 3 if goals_for > goals_against else 1 if goals_for == goals_against else 0
+    return goals_for + bonus
+
+
+class SnakesAndLadders:
+    def __init__(self, team_ids: list[str], board_size: int = BOARD_SIZE, jumps: dict | None = None):
+        self.team_ids = list(team_ids)
+        self.team_index = {team_id: i for i, team_id in enumerate(team_ids)}
+        self.board_size = board_size
+
+        # jump[square] is where a counter on that square ends up
+        self.jump = np.arange(board_size + 1, dtype=np.int16)
+        for start, end in (DEFAULT_JUMPS if jumps is None else jumps).items():
+            self.jump[start] = end
+
+        self.user_ids = []
+        self.row = {}
+        self.positions = np.zeros(0, dtype=np.int16)
+        self.picks = np.zeros(0, dtype=np.int16)
+        self.log = []  # one entry per resolved round, enough to replay it
+
+    def add_players(self, picks: dict):
+        """Add players, {user_id: team_id}; existing players change their team."""
+        new_ids = [u for u in picks if u not in self.row]
+        for user_id in new_ids:
+            self.row[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+        self.positions = np.concatenate([self.positions, np.zeros(len(new_ids), dtype=np.int16)])
+        self.picks = np.concatenate([self.picks, np.zeros(len(new_ids), dtype=np.int16)])
+
+        rows = [self.row[u] for u in picks]
+        self.picks[rows] = [self.team_index[t] for t in picks.values()]
+
+    def team_rolls(self, fixtures: list[dict], roll=result_roll) -> np.ndarray:
+        """Roll per team for a round; teams without a played fixture roll 0."""
+        rolls = np.zeros(len(self.team_ids), dtype=np.int16)
+        for f in fixtures:
+            home, away = f["home_goals"], f["away_goals"]
+            if home is None or away is None:
+                continue
+            if f["home_team_id"] in self.team_index:
+                rolls[self.team_index[f["home_team_id"]]] = roll(home, away)
+            if f["away_team_id"] in self.team_index:
+                rolls[self.team_index[f["away_team_id"]]] = roll(away, home)
+        return rolls
+
+    def _advance(self, positions, picks, rolls):
+        # Players who have finished stay on the last square
+        moved = np.where(positions == self.board_size, positions, positions + rolls[picks])
+        # Overshooting the last square bounces back from it
+        moved = np.where(moved > self.board_size, 2 * self.board_size - moved, moved)
+        return self.jump[moved]
+
+    def resolve_round(self, round_no: int, fixtures: list[dict], roll=result_roll) -> np.ndarray:
+        """Move every player for one round. Returns the user IDs that reached the last square."""
+        rolls = self.team_rolls(fixtures, roll)
+        self.log.append({"round": round_no, "picks": self.picks.copy(), "rolls": rolls})
+        self.positions = self._advance(self.positions, self.picks, rolls)
+        return np.array(self.user_ids, dtype=object)[self.positions == self.board_size]
+
+    def replay(self, upto_round: int | None = None) -> np.ndarray:
+        """Recompute positions from the event log, optionally stopping after a round."""
+        positions = np.zeros(len(self.user_ids), dtype=np.int16)
+        for event in self.log:
+            if upto_round is not None and event["round"] > upto_round:
+                break
+            picks = event["picks"]
+            n = len(picks)
+            positions[:n] = self._advance(positions[:n], picks, event["rolls"])
+        return positions
+
+    def standings(self, limit: int = 20) -> list[dict]:
+        """Players furthest along the board."""
+        order = np.argsort(-self.positions, kind="stable")[:limit]
+        return [{"user_id": self.user_ids[i], "square": int(self.positions[i])} for i in order]
@@ -0,0 +1,183 @@
+"""
+Drive Flet sessions without a browser, for benchmarks and load tests.
+
+HeadlessConnection stands in for the websocket to the Flutter client: it
+assigns control IDs the way Flet's own server does, answers clientStorage
+calls from memory, and counts the messages (and bytes) that would have gone
+over the wire. HeadlessSession wraps a Page built on it and fires events at
+controls, waiting for the handler to finish.
+"""
+import asyncio
+import json
+import threading
+import time
+import uuid
+
+import flet as ft
+from flet.core.control_event import ControlEvent
+from flet.core.local_connection import LocalConnection
+from flet.core.protocol import (
+    ClientActions,
+    ClientMessage,
+    CommandEncoder,
+    PageCommandResponsePayload,
+    PageCommandsBatchResponsePayload,
+)
+
+
+class HeadlessConnection(LocalConnection):
+    def __init__(self):
+        super().__init__()
+        self.page_url = "http://headless"
+        self.page = None
+        self.storage = {}  # clientStorage, as the browser would keep it
+        self.messages = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+    def _count(self, message):
+        if message is None:
+            return
+        size = len(json.dumps(message, cls=CommandEncoder, separators=(",", ":")))
+        with self._lock:
+            self.messages += 1
+            self.bytes_sent += size
+
+    def _run(self, command):
+        """Process one command; returns (result, message for the client)."""
+        result, message = self._process_command(command)
+        if command.name == "invokeMethod":
+            self._count(message)
+            self._answer(command)
+            return result, None
+        return result, message
+
+    def _answer(self, command):
+        """Answer a method call immediately, as a connected client would."""
+        method_id, method_name, _ = command.values
+
+        attrs = command.attrs
+        result = None
+        if method_name == "clientStorage:get":
+            value = self.storage.get(attrs["key"])
+            result = json.dumps(value) if value is not None else None
+        elif method_name == "clientStorage:set":
+            self.storage[attrs["key"]] = attrs["value"]
+            result = "true"
+        elif method_name == "clientStorage:remove":
+            result = "true" if self.storage.pop(attrs["key"], None) is not None else "false"
+        elif method_name == "clientStorage:containskey":
+            result = "true" if attrs["key"] in self.storage else "false"
+
+        handler = self.page._get_event_handler("invoke_method_result")
+        data = json.dumps({"method_id": method_id, "result": result, "error": None})
+        handler(ControlEvent("page", "invoke_method_result", data, self.page, self.page))
+        return ""
+
+    # Batching and results follow flet_socket_server, the real websocket server
+    def send_command(self, session_id: str, command):
+        result, message = self._run(command)
+        self._count(message)
+        return PageCommandResponsePayload(result=result, error="")
+
+    def send_commands(self, session_id: str, commands):
+        results, messages = [], []
+        for command in commands:
+            result, message = self._run(command)
+            if command.name in ["add", "get"]:
+                results.append(result)
+            if message:
+                messages.append(message)
+        if messages:
+            self._count(ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, messages))
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+
+class HeadlessSession:
+    """One simulated browser tab running `main(page)`."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, route: str = "/"):
+        self.conn = HeadlessConnection()
+        self.page = ft.Page(self.conn, uuid.uuid4().hex, loop)
+        self.conn.page = self.page
+        self.page.route = route
+
+        # Track work Flet starts in the background (route events, sync
+        # handlers) so idle() knows when the session has settled
+        self._tasks = set()
+        self._threads = 0
+        self._threads_lock = threading.Lock()
+        run_task, run_thread = self.page.run_task, self.page.run_thread
+
+        def tracked_run_task(handler, *args, **kwargs):
+            future = run_task(handler, *args, **kwargs)
+            self._tasks.add(future)
+            future.add_done_callback(self._tasks.discard)
+            return future
+
+        def tracked_run_thread(handler, *args, **kwargs):
+            with self._threads_lock:
+                self._threads += 1
+
+            def call(*a, **kw):
+                try:
+                    handler(*a, **kw)
+                finally:
+                    with self._threads_lock:
+                        self._threads -= 1
+
+            run_thread(call, *args, **kwargs)
+
+        self.page.run_task = tracked_run_task
+        self.page.run_thread = tracked_run_thread
+
+    async def start(self, main):
+        """Run the app's main() the way Flet does for a sync main: on a worker thread."""
+        await asyncio.to_thread(main, self.page)
+        await self.idle()
+
+    async def fire(self, handler, event):
+        """Call an event handler and wait for it; sync handlers run on a worker thread."""
+        if asyncio.iscoroutinefunction(handler):
+            await handler(event)
+        else:
+            await asyncio.to_thread(handler, event)
+
+    async def click(self, control):
+        await self.fire(control.on_click, ControlEvent(control.uid, "click", "", control, self.page))
+
+    async def go(self, route: str):
+        """Navigate like a click on a route link, waiting for the new view's loads."""
+        self.page.route = route
+        await self.fire(self.page.on_route_change, ft.RouteChangeEvent(route=route))
+        await self.idle()
+
+    async def idle(self, timeout: float = 30):
+        """
+        Wait until background work started by the session (route changes,
+        sync handlers, data loads) is done. Tasks in the "visible" scope are
+        skipped: they are timers like the countdown that run for as long as
+        the view is shown.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            visible = (self.page.session.get("route_tasks") or {}).get("visible", set())
+            if not self._threads and all(task in visible for task in list(self._tasks)):
+                return
+            await asyncio.sleep(0.001)
+        raise TimeoutError(f"Session still busy after {timeout}s")
+
+    def find(self, control_type, predicate=lambda c: True):
+        """First control of a type on the current view that matches."""
+        stack = list(self.page.views)
+        while stack:
+            control = stack.pop(0)
+            if isinstance(control, control_type) and predicate(control):
+                return control
+            stack.extend(control._get_children())
+        return None
+
+    def close(self):
+        for scope, tasks in (self.page.session.get("route_tasks") or {}).items():
+            for task in list(tasks):
+                task.cancel()
@@ -0,0 +1,159 @@
+"""
+Local verification of Supabase access tokens.
+
+Tokens are checked against the project's JWT secret (SUPABASE_JWT_SECRET,
+legacy HS256 projects) or its published signing keys, which are fetched from
+the Auth server's JWKS endpoint and cached. Identity checks then cost a
+signature check instead of an Auth round trip; the Auth server is only
+needed to refresh or revoke a session.
+
+Asymmetric keys (ES256/RS256) need the `cryptography` package
+(`pyjwt[crypto]`); without it, or when a token can't be checked locally for
+any other reason, verify() returns None. verified_user() then asks Auth,
+once per token: the answer is cached until the token expires.
+"""
+import hashlib
+import os
+import threading
+import time
+
+import jwt
+
+from supabase_client import SUPABASE_URL, SUPABASE_KEY
+
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+JWKS_TTL_SECONDS = 10 * 60
+# Don't refetch the key set more often than this when a token's key is unknown
+JWKS_MIN_REFETCH_SECONDS = 30
+AUDIENCE = "authenticated"
+# Tokens whose Auth answer is remembered, when they can't be checked locally
+AUTH_CHECK_CACHE_SIZE = 10_000
+
+
+class JwtVerifier:
+    def __init__(self, url: str | None = SUPABASE_URL, secret: str | None = SUPABASE_JWT_SECRET,
+                 jwks_ttl: float = JWKS_TTL_SECONDS):
+        self.url = url
+        self.secret = secret
+        self.jwks_ttl = jwks_ttl
+        self.verified = 0
+        self.fallbacks = 0
+        self.auth_checks = 0
+        self._auth_checked = {}  # sha256 of token -> (exp, user)
+        self._keys = {}  # kid -> PyJWK
+        self._fetched_at = None
+        self._lock = threading.Lock()
+        self._warned = set()
+
+    def _warn_once(self, reason: str):
+        if reason not in self._warned:
+            self._warned.add(reason)
+            print(f"⚠️ JWT verified by Supabase Auth instead of locally: {reason}")
+
+    def _fetch_keys(self):
+        import httpx
+
+        res = httpx.get(
+            f"{self.url}/auth/v1/.well-known/jwks.json",
+            headers={"apikey": SUPABASE_KEY or ""},
+            timeout=5,
+        )
+        res.raise_for_status()
+        keys = {}
+        for jwk in res.json().get("keys", []):
+            try:
+                keys[jwk.get("kid")] = jwt.PyJWK(jwk)
+            except jwt.PyJWKError as ex:
+                # Usually an ES256/RS256 key without `cryptography` installed
+                self._warn_once(f"signing key {jwk.get('kid')} unusable ({ex})")
+        return keys
+
+    def _signing_key(self, kid: str | None):
+        """Cached key for a kid; the key set is refetched when stale or when a new kid appears."""
+        with self._lock:
+            age = None if self._fetched_at is None else time.monotonic() - self._fetched_at
+            rotated = kid not in self._keys and (age is None or age > JWKS_MIN_REFETCH_SECONDS)
+            if age is None or age > self.jwks_ttl or rotated:
+                try:
+                    self._keys = self._fetch_keys()
+                except Exception as ex:
+                    # Keep serving the keys we have
+                    self._warn_once(f"could not fetch signing keys ({ex})")
+                self._fetched_at = time.monotonic()
+            return self._keys.get(kid)
+
+    def verify(self, token: str, verify_exp: bool = True) -> dict | None:
+        """
+        Returns the token's verified claims, or None if it can't be checked
+        locally. Raises jwt.InvalidTokenError for a bad or expired token.
+        """
+        header = jwt.get_unverified_header(token)
+        alg = header.get("alg")
+        if alg == "HS256":
+            if not self.secret:
+                self._warn_once("HS256 token and SUPABASE_JWT_SECRET is not set")
+                self.fallbacks += 1
+                return None
+            key, algorithm = self.secret, "HS256"
+        else:
+            jwk = self._signing_key(header.get("kid"))
+            if jwk is None:
+                self.fallbacks += 1
+                return None
+            # Trust the key's algorithm, not the one the token claims
+            key, algorithm = jwk.key, jwk.algorithm_name
+
+        claims = jwt.decode(
+            token, key, algorithms=[algorithm], audience=AUDIENCE,
+            options={"verify_exp": verify_exp, "require": ["sub", "exp"]},
+        )
+        self.verified += 1
+        return claims
+
+    def verified_user(self, token: str, client_factory) -> dict:
+        """
+        The user a token was issued to, like user_from_claims. Checked
+        locally when possible, otherwise by Supabase Auth (client_factory()
+        returns the client to ask). Raises jwt.InvalidTokenError unless the
+        token is genuine; Auth errors propagate.
+        """
+        claims = self.verify(token)
+        if claims is not None:
+            return user_from_claims(claims)
+
+        # Keyed on the whole token: its claims aren't verified, so they can't pick the entry
+        key = hashlib.sha256(token.encode()).hexdigest()
+        now = time.time()
+        cached = self._auth_checked.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        res = client_factory().auth.get_user(token)
+        user = getattr(res, "user", None) if res else None
+        if not user:
+            raise jwt.InvalidTokenError("rejected by Supabase Auth")
+        self.auth_checks += 1
+        checked = {"id": user.id, "email": user.email, "user_metadata": dict(user.user_metadata or {})}
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp", 0)
+
+        with self._lock:
+            if len(self._auth_checked) >= AUTH_CHECK_CACHE_SIZE:
+                for k in [k for k, (e, _) in self._auth_checked.items() if e <= now]:
+                    del self._auth_checked[k]
+                if len(self._auth_checked) >= AUTH_CHECK_CACHE_SIZE:
+                    # Oldest first
+                    del self._auth_checked[next(iter(self._auth_checked))]
+            self._auth_checked[key] = (exp, checked)
+        return checked
+
+
+def user_from_claims(claims: dict) -> dict:
+    """Same shape as auth_helpers.get_current_user, from access token claims."""
+    return {
+        "id": claims["sub"],
+        "email": claims.get("email"),
+        "user_metadata": dict(claims.get("user_metadata") or {}),
+    }
+
+
+jwt_verifier = JwtVerifier()
@@ -0,0 +1,238 @@
+import bisect
+import threading
+import time
+import numpy as np
+from scoring import SCORING_RULES, load_catalog, load_predictions, position_matrix
+
+# How often the app re-reads the standings table when the change feed isn't
+# live; boards older than this are then rebuilt, to pick up saves made on
+# other machines
+STANDINGS_REFRESH_SECONDS = 15 * 60
+
+
+class Leaderboard:
+    """
+    Materialized scores and ranks for one league/season.
+    Keeps each user's per-team score contributions so a standings change
+    only recomputes the teams that moved, and a single save only touches
+    that user's row. Ranks come from a sorted (total, user_id) list.
+    """
+
+    def __init__(self, team_ids: list[str], user_ids: list[str], matrix: np.ndarray,
+                 standings: list[str], rule="absolute"):
+        self.team_ids = list(team_ids)
+        self.column = {team_id: i for i, team_id in enumerate(team_ids)}
+        self.rule = SCORING_RULES[rule] if isinstance(rule, str) else rule
+        self.user_ids = list(user_ids)
+        self.row = {user_id: i for i, user_id in enumerate(user_ids)}
+        self.matrix = matrix.astype(np.int16)
+        self.actual = self._positions(standings)
+        self.contrib = self.rule(np.abs(self.matrix - self.actual)).astype(np.int32)
+        self.totals = self.contrib.sum(axis=1)
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._rebuild_order()
+
+    def _positions(self, ranking: list[str]) -> np.ndarray:
+        """0-based position of every team (in column order) within a ranking."""
+        cols = [self.column[team_id] for team_id in ranking]
+        if len(cols) != len(self.team_ids) or len(set(cols)) != len(cols):
+            raise ValueError("ranking is not a permutation of the league's teams")
+        positions = np.empty(len(self.team_ids), dtype=np.int16)
+        positions[cols] = np.arange(len(cols))
+        return positions
+
+    def standings(self) -> list[str]:
+        """The standings the board is scored against, first place first."""
+        return [self.team_ids[c] for c in np.argsort(self.actual)]
+
+    def _rebuild_order(self):
+        order = np.lexsort((np.array(self.user_ids, dtype=object), self.totals))
+        self._order = [(int(self.totals[i]), self.user_ids[i]) for i in order]
+
+    def update_standings(self, standings: list[str]):
+        """Apply a new standings order, rescoring only the teams whose position changed."""
+        with self._lock:
+            actual = self._positions(standings)
+            moved = np.nonzero(actual != self.actual)[0]
+            if not len(moved):
+                return
+            new = self.rule(np.abs(self.matrix[:, moved] - actual[moved])).astype(np.int32)
+            self.totals += new.sum(axis=1) - self.contrib[:, moved].sum(axis=1)
+            self.contrib[:, moved] = new
+            self.actual = actual
+            self._rebuild_order()
+
+    def update_user(self, user_id: str, rankings: list[str]):
+        """Rescore one user's saved ranking and move them to their new rank."""
+        with self._lock:
+            positions = self._positions(rankings)
+            contrib = self.rule(np.abs(positions - self.actual)).astype(np.int32)
+            total = int(contrib.sum())
+
+            i = self.row.get(user_id)
+            if i is None:
+                i = self.row[user_id] = len(self.user_ids)
+                self.user_ids.append(user_id)
+                self.matrix = np.vstack([self.matrix, positions])
+                self.contrib = np.vstack([self.contrib, contrib])
+                self.totals = np.append(self.totals, total)
+            else:
+                del self._order[bisect.bisect_left(self._order, (int(self.totals[i]), user_id))]
+                self.matrix[i] = positions
+                self.contrib[i] = contrib
+                self.totals[i] = total
+            bisect.insort(self._order, (total, user_id))
+
+    def remove_user(self, user_id: str):
+        """Drop a deleted prediction from the table."""
+        with self._lock:
+            i = self.row.pop(user_id, None)
+            if i is None:
+                return
+            del self._order[bisect.bisect_left(self._order, (int(self.totals[i]), user_id))]
+            del self.user_ids[i]
+            self.matrix = np.delete(self.matrix, i, axis=0)
+            self.contrib = np.delete(self.contrib, i, axis=0)
+            self.totals = np.delete(self.totals, i)
+            self.row = {u: j for j, u in enumerate(self.user_ids)}
+
+    def top(self, limit: int = 20, offset: int = 0) -> list[dict]:
+        """One page of the table, best score first. Tied scores share a rank."""
+        return [
+            {"rank": self.rank_of_score(total), "user_id": user_id, "score": total}
+            for total, user_id in self._order[offset:offset + limit]
+        ]
+
+    def rank_of_score(self, total: int) -> int:
+        return bisect.bisect_left(self._order, (total,)) + 1
+
+    def rank(self, user_id: str) -> dict | None:
+        i = self.row.get(user_id)
+        if i is None:
+            return None
+        total = int(self.totals[i])
+        return {"rank": self.rank_of_score(total), "score": total, "of": len(self._order)}
+
+
+# (league, season) -> Leaderboard
+leaderboards = {}
+
+
+def build_leaderboard(league: str, season: str, standings: list[str], rule="absolute", client=None) -> Leaderboard:
+    """Score every saved prediction for a league against the standings."""
+    predictions = load_predictions(league, season, client)
+    catalog = load_catalog(league, season, client)
+    user_ids, matrix, rejected = position_matrix(predictions, standings, catalog)
+    if rejected:
+        print(f"⚠️ leaderboard: skipped {len(rejected)} predictions with stale rankings")
+    return Leaderboard(standings, user_ids, matrix, standings, rule)
+
+
+def update_standings(league: str, season: str, standings: list[str], rule="absolute", client=None,
+                     rebuild: bool = False):
+    """
+    Set the current standings (team IDs, first place first) for a league.
+    The leaderboard is built from the predictions table the first time, and
+    rebuilt when asked to or when the standings' teams aren't the ones it
+    was built with; otherwise only the teams that moved are rescored.
+    """
+    board = leaderboards.get((league, season))
+    if board is None or rebuild or set(standings) != set(board.team_ids):
+        rule = board.rule if board is not None else rule
+        leaderboards[(league, season)] = build_leaderboard(league, season, standings, rule, client)
+    else:
+        board.update_standings(standings)
+
+
+def rebuild_leaderboards(season: str | None = None, client=None):
+    """
+    Rebuild every board for a season (all seasons by default) from the
+    standings and predictions tables. The old boards are served meanwhile.
+    """
+    for s in {key[1] for key in leaderboards if season in (None, key[1])}:
+        sync_standings(s, client, max_age=0)
+
+
+def record_save(league: str, season: str, user_id: str, rankings: list[str]):
+    """Keep an existing leaderboard in step with a newly saved prediction."""
+    board = leaderboards.get((league, season))
+    if board is not None:
+        try:
+            board.update_user(user_id, rankings)
+        except (KeyError, IndexError, ValueError) as ex:
+            print(f"⚠️ leaderboard: could not rescore {user_id}:", ex)
+
+
+def record_delete(league: str, season: str, user_id: str):
+    """Keep an existing leaderboard in step with a deleted prediction."""
+    board = leaderboards.get((league, season))
+    if board is not None:
+        board.remove_user(user_id)
+
+
+# --- Standings source ---
+# The `standings` table holds one row per league/season, written with
+# set_standings.py:
+#     create table standings (
+#         league text, season text, standings jsonb not null,
+#         updated_at timestamptz default now(),
+#         primary key (league, season)
+#     );
+def sync_standings(season: str = "2025/2026", client=None, max_age: float | None = None) -> int:
+    """
+    Apply every league's standings row whose order changed since the last
+    sync; the first one builds the leaderboard. Boards built more than
+    `max_age` seconds ago are rebuilt from the predictions table. Returns
+    leagues updated. Reads every user's predictions, so it needs the
+    service role client.
+    """
+    from supabase_client import service_client
+    from supabase_helpers import safe_execute
+
+    client = client or service_client()
+    if client is None:
+        print("⚠️ leaderboard: SUPABASE_SERVICE_ROLE_KEY is not set; standings not loaded")
+        return 0
+
+    query = client.table("standings").select("league, season, standings").eq("season", season)
+    res = safe_execute(query, f"sync_standings for {season}")
+    updated = 0
+    for row in (res.data if res else []):
+        league, standings = row["league"], row["standings"] or []
+        board = leaderboards.get((league, season))
+        stale = board is not None and max_age is not None and time.monotonic() - board.built_at >= max_age
+        if board is not None and not stale and board.standings() == standings:
+            continue
+        try:
+            update_standings(league, season, standings, client=client, rebuild=stale)
+            updated += 1
+        except (KeyError, ValueError) as ex:
+            print(f"⚠️ leaderboard: standings for {league} {season} not applied:", ex)
+    if updated:
+        print(f"🏆 leaderboard: standings updated for {updated} league(s)")
+    return updated
+
+
+def start_standings_sync(season: str = "2025/2026", feed=None,
+                         interval: float = STANDINGS_REFRESH_SECONDS) -> threading.Thread:
+    """
+    Load the standings now, then re-read them every `interval` seconds on a
+    background thread, rebuilding boards older than that. The poll is
+    skipped while `feed` (a live change feed that delivers standings and
+    prediction changes) is connected.
+    """
+    def run():
+        poll = True  # always load once; the feed only reports changes
+        while True:
+            if poll:
+                try:
+                    sync_standings(season, max_age=interval)
+                except Exception as ex:
+                    print("❌ leaderboard: standings sync failed:", ex)
+            time.sleep(interval)
+            poll = feed is None or not feed.live
+
+    thread = threading.Thread(target=run, name="standings-sync", daemon=True)
+    thread.start()
+    return thread
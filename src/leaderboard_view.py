@@ -0,0 +1,86 @@
+import flet as ft
+from leaderboard import leaderboards
+
+PAGE_SIZE = 20
+
+
+def leaderboard_view(page: ft.Page, user_id: str | None = None):
+    page.title = "EFL 1 to 24s Leaderboard"
+    season = "2025/2026"
+    offset = 0
+
+    rows = ft.Column(spacing=6)
+    my_rank_text = ft.Text("", size=16, weight=ft.FontWeight.BOLD)
+
+    def selected_league():
+        return tabs.tabs[tabs.selected_index].text.lower().replace(" ", "_")
+
+    def show():
+        board = leaderboards.get((selected_league(), season))
+        rows.controls.clear()
+
+        if board is None:
+            my_rank_text.value = ""
+            rows.controls.append(ft.Text("No results yet – check back after the first matchday.", italic=True))
+            return
+
+        mine = board.rank(user_id) if user_id else None
+        my_rank_text.value = (
+            f"Your rank: {mine['rank']} of {mine['of']} ({mine['score']} pts)" if mine else ""
+        )
+        for entry in board.top(PAGE_SIZE, offset):
+            is_me = entry["user_id"] == user_id
+            rows.controls.append(
+                ft.Row(
+                    [
+                        ft.Text(f"{entry['rank']}.", width=50),
+                        ft.Text("You" if is_me else entry["user_id"][:8], width=120,
+                                weight=ft.FontWeight.BOLD if is_me else None),
+                        ft.Text(f"{entry['score']} pts"),
+                    ],
+                    spacing=10,
+                )
+            )
+
+    def change_page(step):
+        nonlocal offset
+        offset = max(0, offset + step * PAGE_SIZE)
+        show()
+        page.update()
+
+    def on_tab_change(e):
+        nonlocal offset
+        offset = 0
+        show()
+        page.update()
+
+    tabs = ft.Tabs(
+        selected_index=0,
+        on_change=on_tab_change,
+        tabs=[
+            ft.Tab(text="Championship"),
+            ft.Tab(text="League One"),
+            ft.Tab(text="League Two"),
+        ],
+    )
+
+    view = ft.Column(
+        controls=[
+            ft.Text("🏆 Leaderboard", size=24, weight=ft.FontWeight.BOLD),
+            tabs,
+            my_rank_text,
+            rows,
+            ft.Row(
+                [
+                    ft.TextButton("◀ Previous", on_click=lambda e: change_page(-1)),
+                    ft.TextButton("Next ▶", on_click=lambda e: change_page(1)),
+                ],
+            ),
+        ],
+        spacing=20,
+        # Scores may have moved since the view was cached
+        data={"on_show": show},
+    )
+
+    show()
+    return view
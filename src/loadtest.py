@@ -0,0 +1,211 @@
+"""
+Load test: N concurrent simulated Flet sessions work through a deadline-rush
+script against a local Supabase stand-in, for increasing N.
+
+Script per session: open /, log in, open /1to24s, reorder, save, switch
+tabs. Sessions start spread over --ramp seconds and pause --think seconds
+between steps, like people clicking. open_1to24s includes the loads the
+login redirect starts, since the user waits for those too.
+
+    python src/loadtest.py --concurrency 10,50,100,200 --latency 0.03
+
+With --save-queue the app gets a service key, so saves go through the
+write-behind queue (save_queue.py) instead of one upsert per user.
+
+The stand-in runs in a child process so its CPU use doesn't count against
+the app. For every concurrency level one JSON line is printed with latency
+percentiles per step, websocket messages and bytes per session, resident
+memory per session and the error rate; the app's own logging goes to stderr.
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+import traceback
+
+import httpx
+
+from benchmarks import configure, log_in, reorder, save, switch_tab
+from fake_supabase import FakeSupabase, FAKE_ANON_KEY, FAKE_SERVICE_KEY
+
+STEPS = ("open_home", "log_in", "open_1to24s", "reorder", "save", "switch_tab")
+
+
+def rss_bytes() -> int:
+    """Resident memory of this process (Linux), or peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentile(values: list[float], p: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 2)
+
+
+def _serve_fake(latency: float, urls):
+    fake = FakeSupabase(latency=latency)
+    urls.put(fake.url)
+    fake._server.serve_forever()
+
+
+def start_backend(latency: float) -> tuple[multiprocessing.Process, str]:
+    urls = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve_fake, args=(latency, urls), daemon=True)
+    process.start()
+    return process, urls.get(timeout=10)
+
+
+def sign_up_users(url: str, count: int, offset: int) -> list[tuple[str, str]]:
+    users = []
+    with httpx.Client(base_url=url, headers={"apikey": FAKE_ANON_KEY}) as client:
+        for i in range(offset, offset + count):
+            email, password = f"load{i}@example.com", "load-password"
+            client.post("/auth/v1/signup", json={"email": email, "password": password}).raise_for_status()
+            users.append((email, password))
+    return users
+
+
+class SessionRun:
+    """One simulated user working through the script."""
+
+    def __init__(self, email: str, password: str, think: float):
+        self.email = email
+        self.password = password
+        self.think = think
+        self.timings = {}  # step -> ms
+        self.error = None
+        self.session = None
+
+    async def step(self, name: str, action):
+        start = time.perf_counter()
+        result = await action()
+        self.timings[name] = (time.perf_counter() - start) * 1000
+        if result is False:
+            raise RuntimeError(f"{name} reported failure")
+        await asyncio.sleep(random.uniform(0, 2 * self.think))
+
+    async def open_1to24s(self):
+        # The redirect after login is still loading; that's part of the wait
+        await self.session.idle()
+        await self.session.go("/1to24s")
+
+    async def run(self, loop, main, delay: float):
+        from headless import HeadlessSession
+
+        await asyncio.sleep(delay)
+        self.session = HeadlessSession(loop, "/")
+        try:
+            await self.step("open_home", lambda: self.session.start(main))
+            await self.step("log_in", lambda: log_in(self.session, self.email, self.password, wait=False))
+            await self.step("open_1to24s", self.open_1to24s)
+            await self.step("reorder", lambda: reorder(self.session, 0, random.randrange(1, 24)))
+            await self.step("save", lambda: save(self.session))
+            await self.step("switch_tab", lambda: switch_tab(self.session, random.randrange(1, 3)))
+        except Exception as ex:
+            self.error = f"{type(ex).__name__}: {ex}"
+            traceback.print_exc()
+
+
+async def run_level(concurrency: int, users, args, main) -> dict:
+    loop = asyncio.get_running_loop()
+    gc.collect()
+    rss_before = rss_bytes()
+
+    runs = [SessionRun(email, password, args.think) for email, password in users]
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        run.run(loop, main, random.uniform(0, args.ramp)) for run in runs
+    ))
+    elapsed = time.perf_counter() - started
+
+    # Sessions are still open here, as they would be in browsers
+    gc.collect()
+    rss_per_session = (rss_bytes() - rss_before) / concurrency
+
+    messages = [run.session.conn.messages for run in runs if run.session]
+    sent = [run.session.conn.bytes_sent for run in runs if run.session]
+    for run in runs:
+        if run.session:
+            run.session.close()
+
+    steps = {}
+    for name in STEPS:
+        times = [run.timings[name] for run in runs if name in run.timings]
+        steps[name] = {
+            "count": len(times),
+            "p50_ms": percentile(times, 50),
+            "p95_ms": percentile(times, 95),
+            "p99_ms": percentile(times, 99),
+            "max_ms": round(max(times), 2) if times else None,
+        }
+
+    errors = [run.error for run in runs if run.error]
+    return {
+        "concurrency": concurrency,
+        "latency_ms": args.latency * 1000,
+        "save_queue": args.save_queue,
+        "elapsed_s": round(elapsed, 2),
+        "steps": steps,
+        "error_rate": len(errors) / concurrency,
+        "errors": sorted(set(errors))[:5],
+        "ws_messages_per_session": sum(messages) / max(len(messages), 1),
+        "ws_bytes_per_session": sum(sent) / max(len(sent), 1),
+        "ws_messages_per_second": round(sum(messages) / elapsed, 1),
+        "rss_mb_per_session": round(rss_per_session / 2**20, 3),
+        "rss_mb_total": round(rss_bytes() / 2**20, 1),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate a deadline rush of concurrent sessions.")
+    parser.add_argument("--concurrency", default="10,50,100",
+                        help="comma-separated session counts to run, in order (default 10,50,100)")
+    parser.add_argument("--latency", type=float, default=0.03,
+                        help="seconds the stand-in adds to every Supabase request (default 0.03)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which sessions start (default 5)")
+    parser.add_argument("--think", type=float, default=0.5, help="mean pause between steps in seconds (default 0.5)")
+    parser.add_argument("--backend-url", help="use an already running stand-in instead of starting one")
+    parser.add_argument("--save-queue", action="store_true",
+                        help="save through the write-behind queue, as with a service key configured")
+    return parser.parse_args(argv)
+
+
+async def run_load_test(args):
+    levels = [int(n) for n in args.concurrency.split(",")]
+    process = None
+    if args.backend_url:
+        url = args.backend_url
+    else:
+        process, url = start_backend(args.latency)
+    configure(url, FAKE_SERVICE_KEY if args.save_queue else "")
+
+    out = sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            from main import main
+
+            offset = 0
+            for concurrency in levels:
+                users = sign_up_users(url, concurrency, offset)
+                offset += concurrency
+                result = await run_level(concurrency, users, args, main)
+                print(json.dumps(result), file=out, flush=True)
+    finally:
+        if process:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_load_test(parse_args()))
@@ -1,15 +1,25 @@
-import flet as ft
-from auth_helpers import try_auto_login, logout_user, get_current_user
-from auth_view import auth_view
-from efl_1_to_24s import efl_1_to_24s_view
-from profile_view import profile_view
+from startup import startup, prewarm
+
+with startup.phase("import flet"):
+    import flet as ft
+
+# Game views are imported when their route is first built (or by prewarm)
+with startup.phase("import app modules"):
+    from auth_helpers import try_auto_login, logout_user, get_user_profile, revalidate_user_profile
+    from supabase_helpers import cancel_route_tasks
+    from view_cache import ViewCache, on_show
+    from metrics import instrument_page, start_metrics_server, timed_handler
+    from change_feed import CHANGE_FEED, start_change_feed
 
 
 def main(page: ft.Page):
+    if not startup.reported:
+        startup.mark("first session connected")
     page.title = "EFL Prediction Games"
     page.padding = 30
     page.scroll = "auto"
     page.theme_mode = ft.ThemeMode.LIGHT
+    instrument_page(page)
 
     # Store user_id in session
     page.session.set("user_id", None)
@@ -17,7 +27,7 @@ def main(page: ft.Page):
     # --- AppBar Navigation ---
     def build_appbar():
         """Build dynamic navigation bar inside an AppBar with Material buttons."""
-        user = get_current_user()
+        user = get_user_profile(page)
 
         actions = [ft.ElevatedButton("Home", on_click=lambda e: page.go("/"))]
 
@@ -27,6 +37,8 @@ def main(page: ft.Page):
                 ft.ElevatedButton(display_name, on_click=lambda e: page.go("/profile"))
             )
             actions.append(ft.ElevatedButton("1to24s", on_click=lambda e: page.go("/1to24s")))
+            actions.append(ft.ElevatedButton("Leaderboard", on_click=lambda e: page.go("/leaderboard")))
+            actions.append(ft.ElevatedButton("Consensus", on_click=lambda e: page.go("/consensus")))
             actions.append(ft.ElevatedButton("Logout", on_click=lambda e: handle_logout()))
         else:
             actions.append(ft.ElevatedButton("Login", on_click=lambda e: page.go("/login")))
@@ -39,15 +51,19 @@ def main(page: ft.Page):
         )
 
     def handle_logout():
-        logout_user()
+        logout_user(page)
         page.session.set("user_id", None)
+        view_cache.invalidate()
         page.go("/")
 
     # --- Routing ---
-    def route_change(e: ft.RouteChangeEvent):
-        page.views.clear()
+    # Routes whose built view (and its state) is kept across navigation
+    CACHED_ROUTES = {"/", "/1to24s", "/leaderboard", "/consensus", "/profile"}
+    view_cache = ViewCache(page)
 
-        if page.route == "/":
+    def build_view(route):
+        """Build the View for a route, or return None after redirecting."""
+        if route == "/":
             # Home page
             games = [
                 {"title": "EFL 1 to 24s", "route": "/login", "coming_soon": False},
@@ -85,118 +101,209 @@ def main(page: ft.Page):
                     )
                 )
 
-            page.views.append(
-                ft.View(
-                    "/",
-                    controls=[
-                        ft.Container(
-                            content=ft.Card(
-                                content=ft.Container(
-                                    content=ft.Column(
-                                        [
-                                            ft.Text("Choose a game mode below", size=18, weight=ft.FontWeight.BOLD),
-                                            ft.ResponsiveRow(tiles, alignment=ft.MainAxisAlignment.CENTER),
-                                        ],
-                                        spacing=20,
-                                        alignment=ft.MainAxisAlignment.CENTER,
-                                        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                                    ),
-                                    padding=30,
-                                    expand=True,
+            return ft.View(
+                "/",
+                controls=[
+                    ft.Container(
+                        content=ft.Card(
+                            content=ft.Container(
+                                content=ft.Column(
+                                    [
+                                        ft.Text("Choose a game mode below", size=18, weight=ft.FontWeight.BOLD),
+                                        ft.ResponsiveRow(tiles, alignment=ft.MainAxisAlignment.CENTER),
+                                    ],
+                                    spacing=20,
+                                    alignment=ft.MainAxisAlignment.CENTER,
+                                    horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                                 ),
-                                elevation=8,
+                                padding=30,
+                                expand=True,
                             ),
-                            alignment=ft.alignment.center,
-                            expand=True,
-                        )
-                    ],
-                    appbar=build_appbar(),
-                )
+                            elevation=8,
+                        ),
+                        alignment=ft.alignment.center,
+                        expand=True,
+                    )
+                ],
+                appbar=build_appbar(),
             )
 
-        elif page.route == "/login":
+        elif route == "/login":
+            from auth_view import auth_view
+
             # Login page
             def on_login_success(user_id):
                 page.session.set("user_id", user_id)
+                view_cache.invalidate()
                 page.go("/1to24s")
 
-            page.views.append(
-                ft.View(
-                    "/login",
-                    controls=[
-                        ft.Container(
-                            content=ft.Card(
-                                content=ft.Container(
-                                    content=auth_view(page, on_login_success=on_login_success),
-                                    padding=30,
-                                ),
-                                elevation=8,
+            return ft.View(
+                "/login",
+                controls=[
+                    ft.Container(
+                        content=ft.Card(
+                            content=ft.Container(
+                                content=auth_view(page, on_login_success=on_login_success),
+                                padding=30,
                             ),
-                            alignment=ft.alignment.center,
-                            expand=True,
-                        )
-                    ],
-                    appbar=build_appbar(),
-                )
+                            elevation=8,
+                        ),
+                        alignment=ft.alignment.center,
+                        expand=True,
+                    )
+                ],
+                appbar=build_appbar(),
             )
 
-        elif page.route == "/1to24s":
+        elif route == "/1to24s":
             # Protect route
             user_id = page.session.get("user_id")
             if not user_id:
                 page.go("/login")
-                return
+                return None
+
+            from efl_1_to_24s import efl_1_to_24s_view
 
             content_view = efl_1_to_24s_view(page, user_id=user_id, on_logout=handle_logout)
 
-            page.views.append(
-                ft.View(
-                    "/1to24s",
-                    controls=[
-                        ft.Container(
-                            content=ft.Card(
-                                content=ft.Container(content=content_view, padding=30),
-                                elevation=8,
-                            ),
-                            alignment=ft.alignment.center,
-                            expand=True,
-                        )
-                    ],
-                    appbar=build_appbar(),
-                )
+            view = ft.View(
+                "/1to24s",
+                controls=[
+                    ft.Container(
+                        content=ft.Card(
+                            content=ft.Container(content=content_view, padding=30),
+                            elevation=8,
+                        ),
+                        alignment=ft.alignment.center,
+                        expand=True,
+                    )
+                ],
+                appbar=build_appbar(),
             )
+            # Lets the route cache run the view's on_show hook
+            view.data = content_view.data
+            return view
 
-        elif page.route == "/profile":
-            page.views.append(
-                ft.View(
-                    "/profile",
-                    controls=[
-                        ft.Container(
-                            content=ft.Card(
-                                content=ft.Container(
-                                    content=profile_view(page, refresh_nav=lambda: page.go(page.route)),
-                                    padding=30,
-                                ),
-                                elevation=8,
+        elif route == "/leaderboard":
+            from leaderboard_view import leaderboard_view
+
+            content_view = leaderboard_view(page, user_id=page.session.get("user_id"))
+
+            view = ft.View(
+                "/leaderboard",
+                controls=[
+                    ft.Container(
+                        content=ft.Card(
+                            content=ft.Container(content=content_view, padding=30),
+                            elevation=8,
+                        ),
+                        alignment=ft.alignment.center,
+                        expand=True,
+                    )
+                ],
+                appbar=build_appbar(),
+            )
+            # Lets the route cache run the view's on_show hook
+            view.data = content_view.data
+            return view
+
+        elif route == "/consensus":
+            from consensus_view import consensus_view
+
+            content_view = consensus_view(page)
+
+            view = ft.View(
+                "/consensus",
+                controls=[
+                    ft.Container(
+                        content=ft.Card(
+                            content=ft.Container(content=content_view, padding=30),
+                            elevation=8,
+                        ),
+                        alignment=ft.alignment.center,
+                        expand=True,
+                    )
+                ],
+                appbar=build_appbar(),
+            )
+            # Lets the route cache run the view's on_show hook
+            view.data = content_view.data
+            return view
+
+        elif route == "/profile":
+            from profile_view import profile_view
+
+            return ft.View(
+                "/profile",
+                controls=[
+                    ft.Container(
+                        content=ft.Card(
+                            content=ft.Container(
+                                content=profile_view(page, refresh_nav=refresh_nav),
+                                padding=30,
                             ),
-                            alignment=ft.alignment.center,
-                            expand=True,
-                        )
-                    ],
-                    appbar=build_appbar(),
-                )
+                            elevation=8,
+                        ),
+                        alignment=ft.alignment.center,
+                        expand=True,
+                    )
+                ],
+                appbar=build_appbar(),
             )
 
+        return None
+
+    def refresh_nav():
+        """Rebuild every view, e.g. after the display name changed."""
+        view_cache.invalidate()
+        page.go(page.route)
+
+    @timed_handler("route_change")
+    def route_change(e: ft.RouteChangeEvent):
+        # Stop timers that only run while a view is on screen
+        cancel_route_tasks(page)
+
+        route = page.route
+        view = view_cache.get(route)
+        if view is None:
+            view = build_view(route)
+            if view is None:
+                return
+            if route in CACHED_ROUTES:
+                view_cache.put(route, view)
+
+        page.views.clear()
+        page.views.append(view)
+        on_show(view)
         page.update()
 
+        if not startup.reported:
+            startup.mark("first page rendered")
+            startup.report_once()
+
     page.on_route_change = route_change
 
     # Auto-login redirect
-    if try_auto_login(lambda user_id: page.session.set("user_id", user_id)):
+    if try_auto_login(lambda user_id: page.session.set("user_id", user_id), page):
+        # The cached profile came from browser storage; check it is still current
+        page.run_task(revalidate_user_profile, page, refresh_nav)
         page.go("/1to24s")
 
     # Start at current route
     page.go(page.route)
 
 
-ft.app(target=main, view=ft.WEB_BROWSER, route_url_strategy="hash")
+if __name__ == "__main__":
+    start_metrics_server()
+    prewarm()
+    feed = start_change_feed() if CHANGE_FEED else None
+    # Off the first-page path: leaderboard pulls in numpy
+    from leaderboard import start_standings_sync
+    start_standings_sync(feed=feed)
+    from save_queue import save_queue
+    if save_queue:
+        # Queued saves were acknowledged to users; write them before the process goes
+        import atexit
+        atexit.register(save_queue.write_remaining)
+    startup.mark("app server starting")
+    ft.app(target=main, view=ft.WEB_BROWSER, route_url_strategy="hash")
@@ -0,0 +1,201 @@
+"""
+In-process metrics for Supabase queries and Flet handlers, exposed in the
+Prometheus text format on a small HTTP server next to the app.
+
+Query metrics are labelled by the description passed to safe_execute, with
+IDs and numbers stripped so per-user descriptions share one series.
+"""
+import os
+import re
+import threading
+import time
+import functools
+import inspect
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9091"))  # 0 disables the endpoint
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "1.0"))
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.I)
+_NUMBER = re.compile(r"\d+")
+
+
+def query_label(description: str) -> str:
+    """Collapse IDs and numbers so a description maps to a bounded set of labels."""
+    label = _UUID.sub(":id", description or "unlabelled")
+    return _NUMBER.sub(":n", label)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Metrics:
+    """Thread-safe registry; safe_execute runs both on handler threads and the event loop."""
+
+    def __init__(self, slow_query_seconds: float = SLOW_QUERY_SECONDS):
+        self.slow_query_seconds = slow_query_seconds
+        self.query_latency = {}   # label -> Histogram
+        self.query_errors = {}    # label -> count
+        self.query_rows = {}      # label -> total rows returned
+        self.queries_in_flight = 0
+        self.handler_latency = {}  # handler name -> Histogram
+        self.page_update_latency = Histogram()
+        self._lock = threading.Lock()
+
+    def query_started(self):
+        with self._lock:
+            self.queries_in_flight += 1
+
+    def query_finished(self, description: str, seconds: float, result=None, error: bool = False):
+        label = query_label(description)
+        rows = getattr(result, "data", None)
+        with self._lock:
+            self.queries_in_flight -= 1
+            self.query_latency.setdefault(label, Histogram()).observe(seconds)
+            if error:
+                self.query_errors[label] = self.query_errors.get(label, 0) + 1
+            if isinstance(rows, list):
+                self.query_rows[label] = self.query_rows.get(label, 0) + len(rows)
+        if seconds >= self.slow_query_seconds:
+            print(f"🐢 Slow query ({seconds:.2f}s): {description}")
+
+    def observe_handler(self, name: str, seconds: float):
+        with self._lock:
+            self.handler_latency.setdefault(name, Histogram()).observe(seconds)
+
+    def observe_page_update(self, seconds: float):
+        with self._lock:
+            self.page_update_latency.observe(seconds)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def histogram(name, help_text, series, label_name):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for label, h in series.items():
+                tag = f'{label_name}="{_escape(label)}",' if label_name else ""
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{tag}le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{tag}le="+Inf"}} {h.count}')
+                suffix = "{" + tag.rstrip(",") + "}" if tag else ""
+                lines.append(f"{name}_sum{suffix} {h.sum}")
+                lines.append(f"{name}_count{suffix} {h.count}")
+
+        def counter(name, help_text, series):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for label, value in series.items():
+                lines.append(f'{name}{{query="{_escape(label)}"}} {value}')
+
+        with self._lock:
+            histogram("efl_query_duration_seconds", "Supabase query latency.", self.query_latency, "query")
+            counter("efl_query_errors_total", "Supabase queries that failed or timed out.", self.query_errors)
+            counter("efl_query_rows_total", "Rows returned by Supabase queries.", self.query_rows)
+            lines.append("# HELP efl_queries_in_flight Supabase queries currently running.")
+            lines.append("# TYPE efl_queries_in_flight gauge")
+            lines.append(f"efl_queries_in_flight {self.queries_in_flight}")
+            histogram("efl_handler_duration_seconds", "Flet event handler duration.", self.handler_latency, "handler")
+            histogram("efl_page_update_duration_seconds", "page.update() duration.",
+                      {"": self.page_update_latency}, None)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
+
+
+# --- Flet instrumentation ---
+def timed_handler(name: str):
+    """Decorator recording how long a Flet event handler (sync or async) takes."""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    metrics.observe_handler(name, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe_handler(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def instrument_page(page):
+    """Time every page.update() call for this session."""
+    update = page.update
+
+    def timed_update(*controls):
+        start = time.perf_counter()
+        try:
+            return update(*controls)
+        finally:
+            metrics.observe_page_update(time.perf_counter() - start)
+
+    page.update = timed_update
+
+
+# --- Endpoint ---
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the app log
+
+
+_server = None
+
+
+def start_metrics_server(port: int = METRICS_PORT):
+    """Serve /metrics on a background thread. Safe to call more than once."""
+    global _server
+    if _server or not port:
+        return _server
+    try:
+        _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    except OSError as ex:
+        print(f"⚠️ Metrics endpoint not started on port {port}:", ex)
+        return None
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    print(f"📈 Metrics on http://0.0.0.0:{port}/metrics")
+    return _server
@@ -0,0 +1,112 @@
+"""
+Backfill saved predictions into the compact ranking format (ranking_codec).
+
+1. Add the columns and the catalog snapshot table (Supabase SQL editor):
+
+       alter table predictions
+           add column positions smallint[],
+           add column catalog_version text;
+
+       create table catalog_versions (
+           version text primary key,
+           team_ids uuid[] not null,
+           created_at timestamptz not null default now()
+       );
+       alter table catalog_versions enable row level security;
+       create policy "read snapshots" on catalog_versions for select using (true);
+       create policy "add snapshots" on catalog_versions for insert to authenticated with check (true);
+
+   Snapshots are insert-only and checked against their version (a hash of
+   the team IDs) when read.
+
+2. Encode existing rows, keeping their team IDs so older app instances
+   still read them:
+
+       python src/migrate_rankings.py --keep-uuids
+
+3. Deploy with COMPACT_RANKINGS=1; new saves are written compact.
+
+4. Run again without --keep-uuids to clear `rankings` on every row that
+   has readable positions, including saves made by older instances
+   during the rollout. The catalog's snapshot is stored first, so the
+   positions stay readable after the catalog changes.
+
+Needs SUPABASE_SERVICE_ROLE_KEY, since it writes every user's rows. Rows
+whose team IDs don't match the current catalog are left untouched.
+"""
+import argparse
+from supabase_client import SUPABASE_SERVICE_KEY, create_session_client
+from supabase_helpers import safe_execute
+from export_predictions import stream_predictions
+from ranking_codec import catalog_version, encode_ranking, rankings_from_row, record_catalog
+from team_cache import get_catalog
+
+LEAGUES = ("championship", "league_one", "league_two")
+BATCH_SIZE = 500
+
+
+def migrate_league(client, league: str, season: str, keep_uuids=False, dry_run=False) -> dict:
+    catalog = get_catalog(league, season, client)
+    if not catalog:
+        print(f"⚠️ No teams for {league} {season}; skipped")
+        return {"migrated": 0, "skipped": 0, "stale": 0}
+    version = catalog_version(catalog)
+    if not dry_run and not record_catalog(catalog, client):
+        raise RuntimeError(f"Could not store the snapshot of catalog {version}; nothing migrated")
+    counts = {"migrated": 0, "skipped": 0, "stale": 0}
+    batch = []
+
+    def flush():
+        if batch and not dry_run:
+            query = client.table("predictions").upsert(batch, on_conflict="user_id,league,season")
+            if safe_execute(query, f"migrate_rankings upsert of {len(batch)} rows") is None:
+                raise RuntimeError(f"Giving up on {league} {season}; rerun to continue")
+        batch.clear()
+
+    rows = stream_predictions(league, season, columns="user_id, rankings, positions, catalog_version",
+                              client=client)
+    for row in rows:
+        if row.get("positions") and row.get("catalog_version") == version:
+            if keep_uuids or not row.get("rankings"):
+                counts["skipped"] += 1
+                continue
+            positions = row["positions"]
+        else:
+            try:
+                # Team IDs, or positions from an older catalog through its snapshot
+                positions = encode_ranking(rankings_from_row(row, catalog, client) or [], catalog)
+            except ValueError:
+                counts["stale"] += 1
+                continue
+
+        batch.append({
+            "user_id": row["user_id"],
+            "league": league,
+            "season": season,
+            "positions": positions,
+            "catalog_version": version,
+            "rankings": row.get("rankings") if keep_uuids else None,
+        })
+        counts["migrated"] += 1
+        if len(batch) == BATCH_SIZE:
+            flush()
+    flush()
+
+    print(f"✅ {league} {season} (catalog {version}): {counts}")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store predictions as compact catalog positions.")
+    parser.add_argument("--season", default="2025/2026")
+    parser.add_argument("--league", action="append", help="league to migrate (repeatable; default all)")
+    parser.add_argument("--keep-uuids", action="store_true", help="keep the team ID arrays alongside")
+    parser.add_argument("--dry-run", action="store_true", help="count rows without writing")
+    args = parser.parse_args()
+
+    if not SUPABASE_SERVICE_KEY:
+        raise SystemExit("❌ SUPABASE_SERVICE_ROLE_KEY is required to rewrite every user's predictions")
+
+    client = create_session_client(SUPABASE_SERVICE_KEY)
+    for league in args.league or LEAGUES:
+        migrate_league(client, league, args.season, args.keep_uuids, args.dry_run)
@@ -1,10 +1,12 @@
 import flet as ft
-from supabase_client import supabase
-from auth_helpers import get_current_user, apply_saved_token
+from supabase_client import session_client
+from metrics import timed_handler
+from auth_helpers import get_user_profile, cache_user_profile, get_token_manager
 
 
 def profile_view(page: ft.Page, refresh_nav=None):
-    user = get_current_user()
+    supabase = session_client(page)
+    user = get_user_profile(page)
     if not user:
         return ft.Text("⚠️ Not logged in", color=ft.Colors.RED)
 
@@ -19,12 +21,15 @@ def profile_view(page: ft.Page, refresh_nav=None):
     confirm_pw_input = ft.TextField(label="Confirm Password", password=True, width=300)
     pw_status = ft.Text("", color=ft.Colors.RED)
 
+    @timed_handler("profile.save_profile")
     def save_profile(e):
         try:
             new_name = display_name_input.value.strip()
+            get_token_manager(page).sync_auth_client()
             res = supabase.auth.update_user({"data": {"display_name": new_name}})
 
             if res and res.user:
+                cache_user_profile(res.user, page)
                 status_text.value = "✅ Profile updated!"
                 status_text.color = ft.Colors.GREEN
                 if refresh_nav:
@@ -37,6 +42,7 @@ def profile_view(page: ft.Page, refresh_nav=None):
             status_text.color = ft.Colors.RED
         page.update()
 
+    @timed_handler("profile.change_password")
     def change_password(e):
         if new_pw_input.value != confirm_pw_input.value:
             pw_status.value = "❌ Passwords do not match"
@@ -45,6 +51,7 @@ def profile_view(page: ft.Page, refresh_nav=None):
             return
 
         try:
+            get_token_manager(page).sync_auth_client()
             res = supabase.auth.update_user({"password": new_pw_input.value})
             if res and res.user:
                 pw_status.value = "✅ Password updated successfully"
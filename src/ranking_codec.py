@@ -0,0 +1,183 @@
+"""
+Compact storage for saved rankings.
+
+A ranking is stored as `positions`, a smallint[] of indexes into the
+league's team catalog (the `teams` rows in sort_order), plus the
+`catalog_version` it was encoded against, instead of a JSON array of 24 team
+UUIDs. [3, 0, 1, ...] means the catalog's 4th team is predicted first.
+
+The version is a hash of the catalog's team IDs in order, so any change to
+the catalog (a team replaced, sort_order edited) gives it a new version.
+Each version's team IDs are kept in the `catalog_versions` table, written
+before anything is encoded against it, so positions saved under an older
+catalog are decoded against that catalog's snapshot; teams that have since
+left it are then treated like stale team IDs. Until a version's snapshot is
+known to exist, saves keep the team IDs too. Enabled with
+COMPACT_RANKINGS=1 once the tables exist; see migrate_rankings.py for the
+schema change and the backfill.
+"""
+import hashlib
+import os
+from supabase_helpers import safe_execute, safe_execute_async
+
+COMPACT_RANKINGS = os.getenv("COMPACT_RANKINGS") == "1"
+
+# Columns to select when reading a saved ranking
+RANKING_COLUMNS = "rankings, positions, catalog_version" if COMPACT_RANKINGS else "rankings"
+SNAPSHOT_TABLE = "catalog_versions"
+
+_snapshots = {}  # version -> team IDs, or None if it has no snapshot
+_recorded = set()  # versions whose snapshot is known to be stored
+_warned = set()
+
+
+def _ids_version(team_ids: list[str]) -> str:
+    digest = hashlib.sha1(",".join(str(team_id) for team_id in team_ids).encode())
+    return digest.hexdigest()[:12]
+
+
+def catalog_version(catalog: list[dict]) -> str:
+    """Short, stable hash of the catalog's team IDs in sort_order."""
+    return _ids_version([team["id"] for team in catalog])
+
+
+def _snapshot_query(catalog: list[dict], client):
+    team_ids = [team["id"] for team in catalog]
+    # Snapshots never change: a version is the hash of its team IDs
+    return client.table(SNAPSHOT_TABLE).upsert(
+        {"version": _ids_version(team_ids), "team_ids": team_ids},
+        on_conflict="version", ignore_duplicates=True,
+    )
+
+
+def _remember_snapshot(catalog: list[dict]):
+    version = catalog_version(catalog)
+    _snapshots[version] = [team["id"] for team in catalog]
+    _recorded.add(version)
+
+
+def snapshot_recorded(catalog: list[dict]) -> bool:
+    return catalog_version(catalog) in _recorded
+
+
+def record_catalog(catalog: list[dict], client) -> bool:
+    """Store the catalog's snapshot once per process. True once it's stored."""
+    if snapshot_recorded(catalog):
+        return True
+    if safe_execute(_snapshot_query(catalog, client), "record_catalog") is None:
+        return False
+    _remember_snapshot(catalog)
+    return True
+
+
+async def record_catalog_async(catalog: list[dict], client) -> bool:
+    if snapshot_recorded(catalog):
+        return True
+    if await safe_execute_async(_snapshot_query(catalog, client), "record_catalog") is None:
+        return False
+    _remember_snapshot(catalog)
+    return True
+
+
+def catalog_snapshot(version: str, client=None) -> list[str] | None:
+    """Team IDs of an earlier catalog version, or None if it has no snapshot."""
+    if version in _snapshots:
+        return _snapshots[version]
+    if client is None:
+        from supabase_client import default_client
+        client = default_client()
+
+    query = client.table(SNAPSHOT_TABLE).select("team_ids").eq("version", version)
+    res = safe_execute(query, f"catalog_snapshot {version}")
+    if res is None:
+        return None
+    team_ids = res.data[0]["team_ids"] if res.data else None
+    if team_ids is not None and _ids_version(team_ids) != version:
+        print(f"⚠️ catalog_snapshot: snapshot for {version} doesn't match its version; ignored")
+        team_ids = None
+    _snapshots[version] = team_ids
+    return team_ids
+
+
+def encode_ranking(team_ids: list[str], catalog: list[dict]) -> list[int]:
+    """Team IDs, first place first -> catalog indexes. Raises ValueError unless it's a permutation."""
+    index = {team["id"]: i for i, team in enumerate(catalog)}
+    positions = [index.get(team_id, -1) for team_id in team_ids]
+    if len(positions) != len(catalog) or -1 in positions or len(set(positions)) != len(positions):
+        raise ValueError("ranking is not a permutation of the league's teams")
+    return positions
+
+
+def decode_ranking(positions: list[int], team_ids: list[str]) -> list[str]:
+    """
+    Catalog indexes -> team IDs, first place first, given the catalog's team
+    IDs in order. Raises ValueError for an out-of-range index.
+    """
+    if any(not 0 <= i < len(team_ids) for i in positions):
+        raise ValueError("ranking refers to a team outside the catalog")
+    return [team_ids[i] for i in positions]
+
+
+def ranking_columns(team_ids: list[str], catalog: list[dict] | None) -> dict:
+    """
+    The prediction columns to write for a ranking. Falls back to team IDs
+    when compact storage is off, the catalog isn't known or doesn't match,
+    and keeps them alongside until the catalog's snapshot is recorded.
+    """
+    if COMPACT_RANKINGS and catalog:
+        try:
+            version = catalog_version(catalog)
+            return {
+                "rankings": None if version in _recorded else team_ids,
+                "positions": encode_ranking(team_ids, catalog),
+                "catalog_version": version,
+            }
+        except ValueError as ex:
+            print("⚠️ ranking_columns: storing team IDs instead:", ex)
+    columns = {"rankings": team_ids}
+    if COMPACT_RANKINGS:
+        columns.update(positions=None, catalog_version=None)
+    return columns
+
+
+def compact_positions(record: dict, catalog: list[dict], version: str | None = None) -> list[int] | None:
+    """A record's stored positions if they were encoded against this catalog, else None."""
+    positions = record.get("positions")
+    if not positions:
+        return None
+    if record.get("catalog_version") != (version or catalog_version(catalog)):
+        return None
+    return positions
+
+
+def needs_snapshot(record: dict | None, catalog: list[dict]) -> bool:
+    """True if decoding the record means fetching an older catalog's snapshot."""
+    version = (record or {}).get("catalog_version")
+    return bool(record and record.get("positions")) and version not in _snapshots \
+        and version != catalog_version(catalog)
+
+
+def rankings_from_row(record: dict | None, catalog: list[dict], client=None) -> list[str] | None:
+    """
+    Team IDs of a saved prediction in either format, or None if there's none
+    it can read. Positions saved against an older catalog are decoded with its
+    snapshot, which may be fetched (see needs_snapshot).
+    """
+    if not record:
+        return None
+    if record.get("positions"):
+        version = record.get("catalog_version")
+        if version == catalog_version(catalog):
+            team_ids = [team["id"] for team in catalog]
+        else:
+            team_ids = catalog_snapshot(version, client)
+        if team_ids is not None:
+            try:
+                return decode_ranking(record["positions"], team_ids)
+            except ValueError as ex:
+                print("⚠️ rankings_from_row:", ex)
+                return None
+        if version not in _warned:
+            _warned.add(version)
+            print(f"⚠️ rankings_from_row: no snapshot of catalog {version}")
+    return record.get("rankings") or None
@@ -0,0 +1,245 @@
+import asyncio
+import time
+from supabase_client import SUPABASE_SERVICE_KEY, service_async_client, service_client
+from supabase_helpers import is_rejection, safe_execute, safe_execute_async
+from ranking_codec import ranking_columns
+
+BATCH_SIZE = 500
+MAX_CONCURRENT_FLUSHES = 4
+FLUSH_INTERVAL_SECONDS = 0.2
+MAX_RETRIES = 5
+RETRY_BASE_SECONDS = 0.5
+# Pause before retrying saves whose batch kept failing
+REQUEUE_DELAY_SECONDS = 10
+# How long process exit waits for queued saves to be written. The last write
+# may run a request timeout past it; fly.toml's kill_timeout (30s) must cover
+# both, or the machine is killed mid-drain.
+SHUTDOWN_DRAIN_SECONDS = 15
+
+
+class RejectedBatch(Exception):
+    """The database refused the rows (bad data, a constraint); retrying won't help."""
+
+
+async def upsert_predictions(rows: list[dict]) -> bool:
+    """
+    Write a batch of prediction rows in one multi-row upsert. False on a
+    transient failure; raises RejectedBatch if the database refuses it.
+    """
+    client = await service_async_client()
+    query = client.table("predictions").upsert(rows, on_conflict="user_id,league,season")
+    try:
+        res = await safe_execute_async(query, f"save_queue upsert of {len(rows)} predictions",
+                                       raise_if=is_rejection)
+    except Exception as ex:
+        raise RejectedBatch(ex) from ex
+    return res is not None
+
+
+def upsert_predictions_sync(rows: list[dict]) -> bool:
+    """upsert_predictions for when there's no event loop left (process exit)."""
+    query = service_client().table("predictions").upsert(rows, on_conflict="user_id,league,season")
+    try:
+        res = safe_execute(query, f"save_queue upsert of {len(rows)} predictions", raise_if=is_rejection)
+    except Exception as ex:
+        raise RejectedBatch(ex) from ex
+    return res is not None
+
+
+class SaveQueue:
+    """
+    Write-behind queue for prediction saves.
+
+    Saves are keyed by (user_id, league, season); a save that arrives while an
+    earlier one for the same key is still waiting replaces it. Pending saves are
+    flushed in multi-row upserts with bounded concurrency and retried with
+    backoff. Each row keeps the time the save was accepted as `updated_at`, so
+    a save accepted before the deadline is still written if the flush lands
+    after it. A batch that keeps failing is put back in the queue, not
+    dropped, and retried after REQUEUE_DELAY_SECONDS. A batch the database
+    rejects is split until the offending rows are found; only those are
+    dropped.
+    """
+
+    def __init__(self, writer=upsert_predictions, batch_size: int = BATCH_SIZE,
+                 max_concurrency: int = MAX_CONCURRENT_FLUSHES, sync_writer=upsert_predictions_sync):
+        self.writer = writer
+        self.sync_writer = sync_writer
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.coalesced = 0
+        self.flushed = 0
+        self._pending = {}  # key -> {"row": {...}, "waiters": [Future, ...]}
+        self._inflight_keys = set()
+        self._wakeup = None
+        self._task = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def submit(self, user_id: str, league: str, season: str, rankings: list[str], accepted_at,
+               catalog=None) -> asyncio.Future:
+        """
+        Queue a save. The row is written with the service role, which
+        bypasses RLS, so user_id must come from a validated access token
+        (TokenManager.ensure_valid), never from client-side state.
+        Returns a future that resolves to True once this save
+        (or a later one that replaced it) has been written, False if the
+        first round of retries failed (the save stays queued), or None if
+        the database rejected it (the save is dropped).
+        """
+        key = (user_id, league, season)
+        row = {
+            "user_id": user_id,
+            "league": league,
+            "season": season,
+            **ranking_columns(rankings, catalog),
+            "updated_at": accepted_at.isoformat(),
+        }
+        waiter = asyncio.get_running_loop().create_future()
+
+        entry = self._pending.get(key)
+        if entry:
+            self.coalesced += 1
+            entry["row"] = row
+            entry["waiters"].append(waiter)
+        else:
+            self._pending[key] = {"row": row, "waiters": [waiter]}
+
+        self._ensure_running()
+        self._wakeup.set()
+        return waiter
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _take_batch(self) -> list:
+        """Pop up to batch_size entries whose key isn't already being written."""
+        batch = []
+        now = time.monotonic()
+        for key, entry in list(self._pending.items()):
+            if key in self._inflight_keys or entry.get("retry_at", 0) > now:
+                continue
+            batch.append((key, self._pending.pop(key)))
+            self._inflight_keys.add(key)
+            if len(batch) == self.batch_size:
+                break
+        return batch
+
+    async def _run(self):
+        slots = asyncio.Semaphore(self.max_concurrency)
+        flushes = set()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Give concurrent saves a moment to coalesce into the same batch
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+
+            while batch := self._take_batch():
+                await slots.acquire()
+                task = asyncio.create_task(self._flush(batch))
+                flushes.add(task)
+                task.add_done_callback(lambda t: (flushes.discard(t), slots.release()))
+
+    def _requeue(self, batch: list, delay: float = 0):
+        retry_at = time.monotonic() + delay
+        for key, entry in batch:
+            self._inflight_keys.discard(key)
+            if key not in self._pending:
+                # Keep the change; a newer save for the same key supersedes it
+                self._pending[key] = {"row": entry["row"], "waiters": [], "retry_at": retry_at}
+
+    async def _write(self, batch: list) -> tuple[list, list, list]:
+        """
+        Write a batch, retrying transient failures. A rejected batch is split
+        in half until the rejected rows are isolated. Returns the
+        (written, rejected, failed) entries.
+        """
+        rows = [entry["row"] for _, entry in batch]
+        for attempt in range(MAX_RETRIES):
+            try:
+                if await self.writer(rows):
+                    return batch, [], []
+            except RejectedBatch as ex:
+                if len(batch) == 1:
+                    key = batch[0][0]
+                    print(f"❌ save_queue: dropped save for {key} rejected by the database:", ex.__cause__ or ex)
+                    return [], batch, []
+                mid = len(batch) // 2
+                first, second = await self._write(batch[:mid]), await self._write(batch[mid:])
+                return tuple(a + b for a, b in zip(first, second))
+            if attempt < MAX_RETRIES - 1:
+                await asyncio.sleep(RETRY_BASE_SECONDS * 2 ** attempt)
+        return [], [], batch
+
+    async def _flush(self, batch: list):
+        try:
+            written, rejected, failed = await self._write(batch)
+        except asyncio.CancelledError:
+            # The loop is shutting down; leave the rows for write_remaining()
+            self._requeue(batch)
+            raise
+
+        for entries, result in ((written, True), (rejected, None), (failed, False)):
+            for _, entry in entries:
+                for waiter in entry["waiters"]:
+                    if not waiter.done():
+                        waiter.set_result(result)
+        self._inflight_keys.difference_update(key for key, _ in written + rejected)
+        self._requeue(failed, REQUEUE_DELAY_SECONDS)
+        self.flushed += len(written)
+
+        if failed:
+            print(f"⚠️ save_queue: {len(failed)} saves failed {MAX_RETRIES} times, "
+                  f"retrying in {REQUEUE_DELAY_SECONDS}s")
+            asyncio.get_running_loop().call_later(REQUEUE_DELAY_SECONDS, self._wakeup.set)
+        elif self._pending:
+            self._wakeup.set()
+
+    async def drain(self, timeout: float | None = None) -> bool:
+        """Wait until everything queued so far has been written, or timeout. True if it was."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._pending or self._inflight_keys:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+        return True
+
+    def write_remaining(self, timeout: float = SHUTDOWN_DRAIN_SECONDS):
+        """
+        Write whatever is still queued, synchronously, for up to `timeout`
+        seconds. Registered with atexit: by then the event loop the queue ran
+        on has stopped, and its in-flight batches were put back in the queue.
+        """
+        if not self._pending:
+            return
+        print(f"💾 save_queue: writing {len(self._pending)} queued saves before exit")
+        deadline = time.monotonic() + timeout
+        batch_size = self.batch_size
+        while self._pending and time.monotonic() < deadline:
+            keys = list(self._pending)[:batch_size]
+            try:
+                ok = self.sync_writer([self._pending[key]["row"] for key in keys])
+            except RejectedBatch as ex:
+                if len(keys) > 1:
+                    # Fall back to one row at a time to find the rejected ones
+                    batch_size = 1
+                    continue
+                print(f"❌ save_queue: dropped save for {keys[0]} rejected by the database:", ex.__cause__ or ex)
+                del self._pending[keys[0]]
+                continue
+            if not ok:
+                time.sleep(RETRY_BASE_SECONDS)
+                continue
+            for key in keys:
+                del self._pending[key]
+            self.flushed += len(keys)
+        if self._pending:
+            print(f"❌ save_queue: {len(self._pending)} queued saves were not written before exit")
+
+
+# Multi-row upserts cover many users, so the queue needs the service role key
+save_queue = SaveQueue() if SUPABASE_SERVICE_KEY else None
@@ -0,0 +1,115 @@
+import numpy as np
+from export_predictions import stream_predictions
+from ranking_codec import COMPACT_RANKINGS, RANKING_COLUMNS, catalog_version, compact_positions, rankings_from_row
+from team_cache import get_catalog
+
+
+# --- Scoring rules ---
+# A rule maps the (users x teams) matrix of absolute position errors to
+# points per cell; lower totals are better.
+def absolute_error(errors: np.ndarray) -> np.ndarray:
+    return errors
+
+
+def squared_error(errors: np.ndarray) -> np.ndarray:
+    return errors.astype(np.int32) ** 2
+
+
+def exact_hit_bonus(errors: np.ndarray, bonus: int = 3) -> np.ndarray:
+    """Absolute error, minus a bonus for every team placed exactly right."""
+    return errors.astype(np.int32) - bonus * (errors == 0)
+
+
+SCORING_RULES = {
+    "absolute": absolute_error,
+    "squared": squared_error,
+    "exact_bonus": exact_hit_bonus,
+}
+
+
+def load_predictions(league: str, season: str = "2025/2026", client=None) -> list[dict]:
+    """Load every prediction for a league/season, a keyset page at a time."""
+    return list(stream_predictions(league, season, columns=f"user_id, {RANKING_COLUMNS}", client=client))
+
+
+def load_catalog(league: str, season: str = "2025/2026", client=None) -> list[dict] | None:
+    """The catalog compact rankings are decoded against; None while they're off."""
+    return get_catalog(league, season, client) if COMPACT_RANKINGS else None
+
+
+def position_matrix(predictions: list[dict], team_ids: list[str], catalog: list[dict] | None = None):
+    """
+    Convert predictions into an int16 matrix of predicted positions.
+    Row u, column t holds the 0-based position user u gave team_ids[t].
+    Returns (user_ids, matrix, rejected_user_ids); rankings that are not a
+    permutation of team_ids (stale IDs, wrong length) are rejected.
+    Compact rankings encoded against `catalog` are mapped without decoding;
+    ones encoded against an older catalog are decoded with its snapshot.
+    """
+    column = {team_id: i for i, team_id in enumerate(team_ids)}
+    n_teams = len(team_ids)
+    if catalog:
+        # Catalog index -> column
+        remap = [column.get(team["id"], -1) for team in catalog]
+        version = catalog_version(catalog)
+
+    user_ids, rows, rejected = [], [], []
+    for record in predictions:
+        positions = compact_positions(record, catalog, version) if catalog else None
+        if positions is not None:
+            cols = [remap[i] if 0 <= i < len(remap) else -1 for i in positions]
+        else:
+            ranking = rankings_from_row(record, catalog) if catalog else record.get("rankings")
+            cols = [column.get(team_id, -1) for team_id in ranking or []]
+        if len(cols) == n_teams and -1 not in cols:
+            user_ids.append(record["user_id"])
+            rows.append(cols)
+        else:
+            rejected.append(record["user_id"])
+
+    # rows[u][p] is the column of the team user u put at position p; invert it
+    cols = np.array(rows, dtype=np.int16).reshape(-1, n_teams)
+    matrix = np.empty_like(cols)
+    matrix[np.arange(len(cols))[:, None], cols] = np.arange(n_teams, dtype=np.int16)
+
+    # Duplicated team IDs leave a column unset; reject those rows too
+    valid = np.sort(cols, axis=1) == np.arange(n_teams)
+    ok = valid.all(axis=1)
+    if not ok.all():
+        rejected.extend(u for u, good in zip(user_ids, ok) if not good)
+        user_ids = [u for u, good in zip(user_ids, ok) if good]
+        matrix = matrix[ok]
+
+    return user_ids, matrix, rejected
+
+
+def score_matrix(matrix: np.ndarray, actual_positions: np.ndarray, rule="absolute") -> dict:
+    """
+    Score every user at once against the actual 0-based position of each team.
+    Returns per-user totals and exact hits, and mean error per team.
+    """
+    rule_fn = SCORING_RULES[rule] if isinstance(rule, str) else rule
+    errors = np.abs(matrix - actual_positions[None, :])
+
+    return {
+        "total": rule_fn(errors).sum(axis=1),
+        "exact_hits": (errors == 0).sum(axis=1),
+        "team_error": errors.mean(axis=0) if len(errors) else np.zeros(matrix.shape[1]),
+    }
+
+
+def score_league(standings: list[str], league: str, season: str = "2025/2026",
+                 rule="absolute", client=None) -> dict:
+    """
+    Score all predictions for a league/season against a standings order
+    (team IDs, first place first). Columns follow the standings order.
+    """
+    predictions = load_predictions(league, season, client)
+    catalog = load_catalog(league, season, client)
+    user_ids, matrix, rejected = position_matrix(predictions, standings, catalog)
+    if rejected:
+        print(f"⚠️ score_league: skipped {len(rejected)} predictions with stale rankings")
+
+    actual = np.arange(len(standings), dtype=np.int16)
+    scores = score_matrix(matrix, actual, rule)
+    return {"user_ids": user_ids, "rejected": rejected, **scores}
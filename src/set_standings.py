@@ -0,0 +1,73 @@
+"""
+Publish a league's current standings to the `standings` table; running app
+servers pick them up (change feed, or their next standings sync) and rescore
+the leaderboard.
+
+    python src/set_standings.py --league championship < table.txt
+
+The input lists the league table first place first, one team per line, by
+name or ID. Needs SUPABASE_SERVICE_ROLE_KEY.
+"""
+import argparse
+import sys
+from datetime import datetime, timezone
+from supabase_client import service_client
+from supabase_helpers import safe_execute
+from team_cache import get_catalog
+
+
+def standings_ids(lines: list[str], catalog: list[dict]) -> list[str]:
+    """Team names or IDs -> team IDs. Raises ValueError unless it's the whole league once each."""
+    by_key = {}
+    for team in catalog:
+        by_key[team["id"]] = team["id"]
+        by_key[team["name"].casefold()] = team["id"]
+
+    ids, unknown = [], []
+    for line in lines:
+        team_id = by_key.get(line) or by_key.get(line.casefold())
+        if team_id is None:
+            unknown.append(line)
+        else:
+            ids.append(team_id)
+    if unknown:
+        raise ValueError(f"unknown teams: {unknown}")
+    if len(ids) != len(catalog) or len(set(ids)) != len(ids):
+        raise ValueError(f"expected each of the {len(catalog)} teams exactly once, got {len(ids)} lines")
+    return ids
+
+
+def set_standings(league: str, season: str, lines: list[str], client) -> bool:
+    catalog = get_catalog(league, season, client)
+    if not catalog:
+        raise ValueError(f"no teams for {league} {season}")
+    query = client.table("standings").upsert(
+        {
+            "league": league,
+            "season": season,
+            "standings": standings_ids(lines, catalog),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        },
+        on_conflict="league,season",
+    )
+    return safe_execute(query, f"set_standings for {league} {season}") is not None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish a league's standings for the leaderboard.")
+    parser.add_argument("--league", required=True, choices=["championship", "league_one", "league_two"])
+    parser.add_argument("--season", default="2025/2026")
+    parser.add_argument("file", nargs="?", type=argparse.FileType(), default=sys.stdin,
+                        help="teams first place first, one per line (default stdin)")
+    args = parser.parse_args()
+
+    client = service_client()
+    if client is None:
+        raise SystemExit("❌ SUPABASE_SERVICE_ROLE_KEY is required to publish standings")
+
+    lines = [line.strip() for line in args.file if line.strip()]
+    try:
+        ok = set_standings(args.league, args.season, lines, client)
+    except ValueError as ex:
+        raise SystemExit(f"❌ {ex}")
+    print("✅ Standings published" if ok else "❌ Could not publish standings")
@@ -0,0 +1,82 @@
+"""
+Cold-start support for deployments that scale to zero.
+
+The first visitor after a machine starts should only wait for Flet and the
+home page. Everything else (the Supabase client, the game views and the
+team catalog) is loaded by prewarm() on a background thread while the app
+server comes up, and a timing report shows where the startup time went.
+"""
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+SEASON = "2025/2026"
+PREWARM_LEAGUES = ("championship", "league_one", "league_two")
+PREWARM_MODULES = ("auth_view", "efl_1_to_24s", "leaderboard_view", "consensus_view", "profile_view")
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []  # (name, start offset, duration or None while running)
+        self.reported = False
+        self._lock = threading.Lock()
+
+    def _now(self) -> float:
+        return time.perf_counter() - self.started
+
+    def mark(self, name: str):
+        """Record a moment, e.g. the first page being served."""
+        with self._lock:
+            self.phases.append([name, self._now(), 0.0])
+
+    @contextmanager
+    def phase(self, name: str):
+        with self._lock:
+            entry = [name, self._now(), None]
+            self.phases.append(entry)
+        try:
+            yield
+        finally:
+            entry[2] = self._now() - entry[1]
+
+    def report(self) -> str:
+        with self._lock:
+            lines = ["⏱️ Startup timing (seconds since main.py started):"]
+            for name, start, duration in self.phases:
+                took = "running" if duration is None else f"{duration:.3f}s"
+                lines.append(f"   {start:7.3f}  {name:<32} {took}")
+        return "\n".join(lines)
+
+    def report_once(self):
+        """Print the report the first time a page is served."""
+        if not self.reported:
+            self.reported = True
+            print(self.report())
+
+
+startup = StartupTimer()
+
+
+def _prewarm(leagues, season):
+    from supabase_client import default_client
+
+    with startup.phase("supabase client (background)"):
+        default_client()
+    with startup.phase("game views (background)"):
+        for module in PREWARM_MODULES:
+            importlib.import_module(module)
+    with startup.phase("team catalog (background)"):
+        get_teams = importlib.import_module("efl_1_to_24s").get_teams
+        for league in leagues:
+            get_teams(league, season)
+    print(f"🔥 Prewarm finished in {startup._now():.3f}s")
+    print(startup.report())
+
+
+def prewarm(leagues=PREWARM_LEAGUES, season: str = SEASON) -> threading.Thread:
+    """Load the Supabase client, game views and team catalog on a background thread."""
+    thread = threading.Thread(target=_prewarm, args=(leagues, season), name="prewarm", daemon=True)
+    thread.start()
+    return thread
@@ -1,10 +1,164 @@
-from supabase import create_client
 import os
+import threading
 from dotenv import load_dotenv
 
+# `supabase` and `httpx` are imported on first use rather than here: the
+# app can serve its first page before they are loaded (see startup.py)
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
+# Only needed for server-side jobs that write other users' rows (e.g. the save queue)
+SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+# Connection pool shared by every session's client
+MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "50"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY_SECONDS = 30
+REQUEST_TIMEOUT_SECONDS = 10
+# TokenManager owns refresh and persistence; without these every client
+# would start its own gotrue refresh timer thread
+AUTH_OPTIONS = {"auto_refresh_token": False, "persist_session": False}
+
+_transport = None
+_async_transport = None
+_default_client = None
+_init_lock = threading.Lock()
+
+
+def _limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def _shared_transport():
+    global _transport
+    with _init_lock:
+        if _transport is None:
+            import httpx
+            _transport = httpx.HTTPTransport(http2=True, retries=1, limits=_limits())
+    return _transport
+
+
+def _shared_async_transport():
+    global _async_transport
+    with _init_lock:
+        if _async_transport is None:
+            import httpx
+            _async_transport = httpx.AsyncHTTPTransport(http2=True, retries=1, limits=_limits())
+    return _async_transport
+
+
+def create_session_client(key: str | None = None):
+    """
+    Create a Supabase client with its own headers and auth state.
+    All clients send requests through the shared pooled transport, so a new
+    client reuses warm keep-alive connections instead of opening its own.
+    """
+    import httpx
+    from supabase import create_client, ClientOptions
+
+    http_client = httpx.Client(
+        transport=_shared_transport(),
+        timeout=REQUEST_TIMEOUT_SECONDS,
+        follow_redirects=True,
+    )
+    return create_client(
+        SUPABASE_URL,
+        key or SUPABASE_KEY,
+        options=ClientOptions(httpx_client=http_client, **AUTH_OPTIONS),
+    )
+
+
+def session_client(page=None):
+    """
+    Returns the Supabase client for a Flet session, creating it on first use.
+    Without a page, returns the module-level client (scripts, shared caches).
+    """
+    if page is None:
+        return default_client()
+
+    client = page.session.get("supabase")
+    if client is None:
+        client = create_session_client()
+        page.session.set("supabase", client)
+    return client
+
+
+async def create_async_session_client(key: str | None = None):
+    """Async counterpart of create_session_client, on the shared async transport."""
+    import httpx
+    from supabase import acreate_client, AsyncClientOptions
+
+    http_client = httpx.AsyncClient(
+        transport=_shared_async_transport(),
+        timeout=REQUEST_TIMEOUT_SECONDS,
+        follow_redirects=True,
+    )
+    return await acreate_client(
+        SUPABASE_URL, key or SUPABASE_KEY, options=AsyncClientOptions(httpx_client=http_client, **AUTH_OPTIONS)
+    )
+
+
+_service_client = None
+
+
+async def service_async_client():
+    """Async client authenticated with the service role key, or None if it isn't configured."""
+    global _service_client
+    if _service_client is None and SUPABASE_SERVICE_KEY:
+        _service_client = await create_async_session_client(SUPABASE_SERVICE_KEY)
+    return _service_client
+
+
+_service_sync_client = None
+
+
+def service_client():
+    """Sync client authenticated with the service role key, or None if it isn't configured."""
+    global _service_sync_client
+    if _service_sync_client is None and SUPABASE_SERVICE_KEY:
+        client = create_session_client(SUPABASE_SERVICE_KEY)
+        with _init_lock:
+            if _service_sync_client is None:
+                _service_sync_client = client
+    return _service_sync_client
+
+
+async def async_session_client(page, access_token: str | None = None):
+    """
+    Returns the async Supabase client for a Flet session, creating it on
+    first use, with the session's current access token applied.
+    """
+    client = page.session.get("supabase_async")
+    if client is None:
+        client = await create_async_session_client()
+        page.session.set("supabase_async", client)
+
+    client.postgrest.auth(access_token or SUPABASE_KEY)
+    return client
+
+
+def default_client():
+    """The module-level client, created on first use."""
+    global _default_client
+    if _default_client is None:
+        client = create_session_client()
+        with _init_lock:
+            if _default_client is None:
+                _default_client = client
+    return _default_client
+
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+def __getattr__(name):
+    # Keeps `from supabase_client import supabase` working without creating
+    # the client at import time
+    if name == "supabase":
+        return default_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,9 +1,101 @@
+import asyncio
+import time
 import traceback
-def safe_execute(query, description=""):
+from metrics import metrics
+
+# Upper bound for a single async PostgREST call
+QUERY_TIMEOUT_SECONDS = 10
+# Postgres error classes retrying won't fix: data exception, integrity
+# constraint violation, syntax error or access rule violation
+REJECTED_SQLSTATE_CLASSES = ("22", "23", "42")
+
+
+def is_rejection(ex: Exception) -> bool:
+    """
+    True if PostgREST refused the request itself (a 4xx: bad data, a
+    constraint or permission failure), as opposed to a timeout, network
+    error or 5xx that may succeed on retry.
+    """
+    from postgrest.exceptions import APIError
+
+    if not isinstance(ex, APIError):
+        return False
+    code = ex.code
+    if isinstance(code, int):
+        # Non-JSON error body; `code` is the HTTP status
+        return 400 <= code < 500 and code not in (408, 429)
+    code = str(code or "")
+    # PGRST1xx/PGRST2xx: malformed request or schema mismatch
+    return code[:2] in REJECTED_SQLSTATE_CLASSES or code[:6] in ("PGRST1", "PGRST2")
+
+
+def safe_execute(query, description="", raise_if=None):
+    """
+    Execute a query, returning None on failure. Errors for which
+    raise_if(ex) is true are raised instead.
+    """
+    metrics.query_started()
+    start = time.perf_counter()
     try:
         result = query.execute()
+        metrics.query_finished(description, time.perf_counter() - start, result)
         return result
     except Exception as ex:
+        metrics.query_finished(description, time.perf_counter() - start, error=True)
+        if raise_if and raise_if(ex):
+            raise
         print(f"❌ Supabase execute failed during: {description}")
         traceback.print_exc()
         return None
+
+
+async def safe_execute_async(query, description="", timeout=QUERY_TIMEOUT_SECONDS, raise_if=None):
+    """
+    Async version of safe_execute for queries built on the async client.
+    Returns None on failure or timeout; cancellation is propagated, as are
+    errors for which raise_if(ex) is true.
+    """
+    metrics.query_started()
+    start = time.perf_counter()
+    result, error = None, True
+    try:
+        result = await asyncio.wait_for(query.execute(), timeout)
+        error = False
+        return result
+    except asyncio.CancelledError:
+        error = False
+        raise
+    except asyncio.TimeoutError:
+        print(f"⏱️ Supabase execute timed out after {timeout}s during: {description}")
+        return None
+    except Exception as ex:
+        if raise_if and raise_if(ex):
+            raise
+        print(f"❌ Supabase execute failed during: {description}")
+        traceback.print_exc()
+        return None
+    finally:
+        metrics.query_finished(description, time.perf_counter() - start, result, error=error)
+
+
+def run_for_route(page, coro_fn, *args, scope="visible"):
+    """
+    Start a task on the page that is cancelled with cancel_route_tasks.
+    The default "visible" scope is cancelled whenever the user changes
+    route; a cached view passes its route as the scope so its tasks live
+    until the view is evicted.
+    """
+    task = page.run_task(coro_fn, *args)
+    scopes = page.session.get("route_tasks") or {}
+    tasks = scopes.setdefault(scope, set())
+    page.session.set("route_tasks", scopes)
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+    return task
+
+
+def cancel_route_tasks(page, scope="visible"):
+    """Cancel every task started with run_for_route in the given scope."""
+    scopes = page.session.get("route_tasks") or {}
+    for task in list(scopes.get(scope, ())):
+        task.cancel()
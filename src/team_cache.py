@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+
+# How long a (league, season) catalog is served before it is fetched again
+CATALOG_TTL_SECONDS = 15 * 60
+
+
+class TeamCatalogCache:
+    """
+    Process-wide cache of `teams` rows keyed by (league, season).
+    Shared by every Flet session; concurrent loads of the same key
+    are collapsed into a single fetch.
+    """
+
+    def __init__(self, ttl: float = CATALOG_TTL_SECONDS):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.waits = 0  # callers that joined another caller's in-flight load
+        self._entries = {}  # (league, season) -> (loaded_at, teams)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._inflight = {}  # (league, season) -> asyncio.Task for async loads
+
+    def _fresh(self, key):
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, league: str, season: str, loader) -> list[dict]:
+        """
+        Return the catalog for (league, season), calling loader() on a miss.
+        Empty or failed loads are not cached.
+        """
+        key = (league, season)
+        teams = self._fresh(key)
+        if teams is None:
+            with self._key_lock(key):
+                # Another session may have loaded it while we waited
+                teams = self._fresh(key)
+                if teams is None:
+                    if key in self._entries:
+                        self.refreshes += 1
+                    else:
+                        self.misses += 1
+                    teams = loader() or []
+                    if teams:
+                        self._entries[key] = (time.monotonic(), teams)
+                    return list(teams)
+        self.hits += 1
+        return list(teams)
+
+    async def get_async(self, league: str, season: str, loader) -> list[dict]:
+        """
+        Async version of get(): loader is awaited, and concurrent callers
+        for the same key await the one in-flight load. The load runs as its
+        own task, so cancelling one caller doesn't cancel it for the others.
+        """
+        key = (league, season)
+        teams = self._fresh(key)
+        if teams is not None:
+            self.hits += 1
+            return list(teams)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.waits += 1
+        else:
+            if key in self._entries:
+                self.refreshes += 1
+            else:
+                self.misses += 1
+            task = asyncio.get_running_loop().create_task(self._load_async(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._load_done(key, t))
+        return list(await asyncio.shield(task))
+
+    async def _load_async(self, key, loader) -> list[dict]:
+        teams = await loader() or []
+        if teams:
+            self._entries[key] = (time.monotonic(), teams)
+        return teams
+
+    def _load_done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every caller has gone
+
+    def find_teams(self, team_ids) -> dict:
+        """Look up teams by ID across all fresh catalogs. Returns {id: team}."""
+        wanted = set(team_ids)
+        found = {}
+        for key in list(self._entries):
+            for team in self._fresh(key) or []:
+                if team["id"] in wanted:
+                    found[team["id"]] = team
+        return found
+
+    def invalidate(self, league: str | None = None, season: str | None = None):
+        """Drop cached catalogs. With no arguments, clears everything."""
+        with self._lock:
+            for key in list(self._entries):
+                if league in (None, key[0]) and season in (None, key[1]):
+                    del self._entries[key]
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "waits": self.waits,
+            "entries": len(self._entries),
+        }
+
+
+team_catalog = TeamCatalogCache()
+
+
+def get_catalog(league: str, season: str = "2025/2026", client=None) -> list[dict]:
+    """The league's `teams` rows in sort_order, through the shared cache."""
+    def fetch():
+        from supabase_client import default_client
+        from supabase_helpers import safe_execute
+
+        query = (
+            (client or default_client()).table("teams")
+            .select("*")
+            .eq("league", league)
+            .eq("season", season)
+            .order("sort_order")
+        )
+
+        res = safe_execute(query, f"get_teams for {league} {season}")
+        return res.data if res else []
+
+    return team_catalog.get(league, season, fetch)
@@ -0,0 +1,75 @@
+import random
+
+import numpy as np
+import pytest
+
+from consensus import Consensus, ConsensusTables
+from fake_supabase import LEAGUES, SEASON
+
+TEAMS = [f"t{i}" for i in range(20)]
+
+
+def positions(ranking: list[str]) -> list[int]:
+    return [ranking.index(team_id) for team_id in TEAMS]
+
+
+def rebuilt(rankings: dict) -> Consensus:
+    user_ids = list(rankings)
+    matrix = np.array([positions(rankings[u]) for u in user_ids], dtype=np.int16).reshape(-1, len(TEAMS))
+    return Consensus.from_matrix(TEAMS, user_ids, matrix)
+
+
+def test_incremental_updates_match_a_rebuild():
+    rng = random.Random(3)
+    rankings = {}
+    consensus = Consensus(TEAMS)
+    for _ in range(3000):
+        user_id = f"u{rng.randrange(200)}"
+        if rng.random() < 0.2:
+            consensus.remove_user(user_id)
+            rankings.pop(user_id, None)
+        else:
+            rankings[user_id] = rng.sample(TEAMS, len(TEAMS))
+            consensus.update_user(user_id, rankings[user_id])
+
+    expected = rebuilt(rankings)
+    assert consensus.count == expected.count == len(rankings)
+    assert consensus.sums.tolist() == expected.sums.tolist()
+    assert consensus.sq_sums.tolist() == expected.sq_sums.tolist()
+    assert consensus.histogram.tolist() == expected.histogram.tolist()
+    assert consensus.table() == expected.table()
+
+
+def test_table_statistics():
+    consensus = rebuilt({"a": TEAMS, "b": TEAMS, "c": TEAMS[::-1]})
+    first = consensus.table()[0]
+    assert first["team_id"] == "t0"
+    assert first["mean"] == pytest.approx((1 + 1 + 20) / 3)
+    assert first["mode"] == 1 and first["mode_share"] == pytest.approx(2 / 3)
+    assert Consensus(TEAMS).table() == []
+
+
+def test_update_rejects_a_ranking_that_is_not_a_permutation():
+    consensus = Consensus(TEAMS)
+    with pytest.raises(ValueError):
+        consensus.update_user("a", TEAMS[:-1] + [TEAMS[0]])
+    with pytest.raises(KeyError):
+        consensus.update_user("a", TEAMS[:-1] + ["gone"])
+    assert consensus.count == 0
+
+
+def test_tables_build_from_predictions_and_apply_saves(fake):
+    teams = [t["id"] for t in fake.tables["teams"] if t["league"] == LEAGUES[0]]
+    fake.tables["predictions"].append({"user_id": "a", "league": LEAGUES[0], "season": SEASON, "rankings": teams})
+    tables = ConsensusTables()
+
+    consensus = tables.get(LEAGUES[0], SEASON)
+    assert consensus.count == 1 and tables.cached(LEAGUES[0], SEASON) is consensus
+
+    tables.record_save(LEAGUES[0], SEASON, "b", teams[::-1])
+    tables.record_save(LEAGUES[0], SEASON, "c", ["gone"] * len(teams))
+    tables.record_delete(LEAGUES[0], SEASON, "a")
+    assert list(consensus.positions) == ["b"]
+
+    tables.invalidate(LEAGUES[0])
+    assert tables.cached(LEAGUES[0], SEASON) is None
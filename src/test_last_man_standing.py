@@ -0,0 +1,70 @@
+from games.last_man_standing import LastManStanding, resolve_round, team_results
+from supabase_client import service_client
+
+SEASON = "2025/2026"
+FIXTURES = [
+    {"home_team_id": "win", "away_team_id": "lose", "home_goals": 2, "away_goals": 0},
+    {"home_team_id": "draw_a", "away_team_id": "draw_b", "home_goals": 1, "away_goals": 1},
+    {"home_team_id": "later_a", "away_team_id": "later_b", "home_goals": None, "away_goals": None},
+]
+
+
+def game() -> LastManStanding:
+    users = ["winner", "loser", "drawer", "postponed", "no_fixture", "no_pick"]
+    return LastManStanding(SEASON, [{"user_id": u} for u in users] + [
+        {"user_id": "out", "alive": False, "eliminated_round": 1, "used_team_ids": ["win"]},
+    ])
+
+
+PICKS = [
+    {"user_id": "winner", "team_id": "win"},
+    {"user_id": "loser", "team_id": "lose"},
+    {"user_id": "drawer", "team_id": "draw_a"},
+    {"user_id": "postponed", "team_id": "later_b"},
+    {"user_id": "no_fixture", "team_id": "idle"},
+    {"user_id": "out", "team_id": "win"},
+]
+
+
+def test_team_results():
+    assert team_results(FIXTURES) == {
+        "win": "W", "lose": "L", "draw_a": "D", "draw_b": "D", "later_a": None, "later_b": None,
+    }
+
+
+def test_resolve_round():
+    lms = game()
+    survivors, eliminated = lms.resolve_round(2, PICKS, FIXTURES)
+    assert sorted(survivors) == ["postponed", "winner"]
+    assert sorted(eliminated) == ["drawer", "loser", "no_fixture", "no_pick"]
+    assert lms.alive == {"postponed", "winner"}
+    assert lms.eliminated_round == {"out": 1, **{u: 2 for u in eliminated}}
+    assert lms.used["winner"] == {"win"} and lms.used["no_pick"] == set()
+    assert lms.used["out"] == {"win"}
+
+
+def test_validate_pick():
+    lms = game()
+    lms.resolve_round(2, PICKS, FIXTURES)
+    assert lms.validate_pick("out", "draw_a") == "You have been eliminated."
+    assert lms.validate_pick("winner", "win") == "You have already used this team."
+    assert lms.validate_pick("winner", "idle", FIXTURES) == "This team has no fixture this round."
+    assert lms.validate_pick("winner", "idle") is None
+    lms.join("late")
+    assert lms.validate_pick("late", "win", FIXTURES) is None
+
+
+def test_resolve_round_writes_entries(fake):
+    fake.tables.update(
+        lms_entries=game().entry_rows(["winner", "loser", "drawer", "postponed", "no_fixture", "no_pick"]),
+        lms_picks=[{"season": SEASON, "round": 2, **p} for p in PICKS if p["user_id"] != "out"],
+        fixtures=[{"season": SEASON, "round": 2, **f} for f in FIXTURES],
+    )
+    client = service_client()
+    lms = game()
+    survivors, eliminated = resolve_round(lms, 2, client)
+    assert sorted(survivors) == ["postponed", "winner"]
+    assert len(fake.tables["lms_entries"]) == 6
+    entries = {e["user_id"]: e for e in fake.tables["lms_entries"]}
+    assert entries["loser"]["alive"] is False and entries["loser"]["eliminated_round"] == 2
+    assert entries["winner"]["alive"] is True and entries["winner"]["used_team_ids"] == ["win"]
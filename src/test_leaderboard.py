@@ -0,0 +1,92 @@
+import random
+
+import numpy as np
+import pytest
+
+import leaderboard
+from fake_supabase import LEAGUES, SEASON
+from leaderboard import Leaderboard, leaderboards, sync_standings
+
+TEAMS = [f"t{i}" for i in range(24)]
+
+
+def positions(ranking: list[str]) -> list[int]:
+    return [ranking.index(team_id) for team_id in TEAMS]
+
+
+def rebuilt(rankings: dict, standings: list[str], rule="absolute") -> Leaderboard:
+    user_ids = list(rankings)
+    matrix = np.array([positions(rankings[u]) for u in user_ids], dtype=np.int16).reshape(-1, len(TEAMS))
+    return Leaderboard(TEAMS, user_ids, matrix, standings, rule)
+
+
+@pytest.fixture
+def boards():
+    leaderboards.clear()
+    yield leaderboards
+    leaderboards.clear()
+
+
+@pytest.mark.parametrize("rule", ["absolute", "squared", "exact_bonus"])
+def test_incremental_updates_match_a_rebuild(rule):
+    rng = random.Random(2)
+    rankings = {f"u{i}": rng.sample(TEAMS, 24) for i in range(50)}
+    standings = rng.sample(TEAMS, 24)
+    board = rebuilt(rankings, standings, rule)
+
+    for _ in range(2000):
+        action = rng.random()
+        user_id = f"u{rng.randrange(80)}"
+        if action < 0.1:
+            board.remove_user(user_id)
+            rankings.pop(user_id, None)
+        elif action < 0.15:
+            standings = rng.sample(TEAMS, 24)
+            board.update_standings(standings)
+        else:
+            rankings[user_id] = rng.sample(TEAMS, 24)
+            board.update_user(user_id, rankings[user_id])
+
+    expected = rebuilt(rankings, standings, rule)
+    assert board.standings() == standings
+    assert {u: board.rank(u) for u in rankings} == {u: expected.rank(u) for u in rankings}
+    assert board.top(len(rankings)) == expected.top(len(rankings))
+
+
+def test_ties_share_a_rank():
+    board = rebuilt({"a": TEAMS, "b": TEAMS, "c": TEAMS[::-1]}, TEAMS)
+    assert [row["rank"] for row in board.top()] == [1, 1, 3]
+    assert board.rank("c") == {"rank": 3, "score": board.rank("c")["score"], "of": 3}
+
+
+def test_sync_standings_builds_and_rebuilds(fake, boards):
+    teams = [t["id"] for t in fake.tables["teams"] if t["league"] == LEAGUES[0]]
+    fake.tables["predictions"].append({"user_id": "a", "league": LEAGUES[0], "season": SEASON, "rankings": teams})
+    fake.tables["standings"] = [{"league": LEAGUES[0], "season": SEASON, "standings": teams[::-1]}]
+
+    assert sync_standings(SEASON) == 1
+    board = boards[(LEAGUES[0], SEASON)]
+    assert board.user_ids == ["a"]
+
+    # Saved on another machine: only picked up by a rebuild
+    fake.tables["predictions"].append({"user_id": "b", "league": LEAGUES[0], "season": SEASON, "rankings": teams[::-1]})
+    assert sync_standings(SEASON) == 0
+    assert sync_standings(SEASON, max_age=0) == 1
+    assert boards[(LEAGUES[0], SEASON)].rank("b")["rank"] == 1
+
+
+def test_standings_with_a_new_team_rebuild_the_board(fake, boards):
+    teams = [t["id"] for t in fake.tables["teams"] if t["league"] == LEAGUES[0]]
+    fake.tables["standings"] = [{"league": LEAGUES[0], "season": SEASON, "standings": teams}]
+    sync_standings(SEASON)
+
+    fake.tables["standings"][0]["standings"] = ["promoted"] + teams[1:]
+    assert sync_standings(SEASON) == 1
+    assert boards[(LEAGUES[0], SEASON)].team_ids[0] == "promoted"
+
+
+def test_record_save_patches_an_existing_board(boards):
+    boards[(LEAGUES[0], SEASON)] = rebuilt({"a": TEAMS}, TEAMS)
+    leaderboard.record_save(LEAGUES[0], SEASON, "b", TEAMS[::-1])
+    leaderboard.record_delete(LEAGUES[0], SEASON, "a")
+    assert boards[(LEAGUES[0], SEASON)].user_ids == ["b"]
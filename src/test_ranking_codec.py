@@ -0,0 +1,83 @@
+import pytest
+
+import ranking_codec
+from fake_supabase import LEAGUES
+from ranking_codec import (
+    catalog_snapshot, catalog_version, decode_ranking, encode_ranking, needs_snapshot,
+    ranking_columns, record_catalog, rankings_from_row,
+)
+from scoring import position_matrix
+from supabase_client import service_client
+
+
+@pytest.fixture
+def codec(fake, monkeypatch):
+    monkeypatch.setattr(ranking_codec, "COMPACT_RANKINGS", True)
+    for state in (ranking_codec._snapshots, ranking_codec._recorded, ranking_codec._warned):
+        state.clear()
+    fake.tables["catalog_versions"] = []
+    yield fake
+    for state in (ranking_codec._snapshots, ranking_codec._recorded, ranking_codec._warned):
+        state.clear()
+
+
+def league_catalog(fake) -> list[dict]:
+    return [t for t in fake.tables["teams"] if t["league"] == LEAGUES[0]]
+
+
+def test_round_trip(codec):
+    catalog = league_catalog(codec)
+    team_ids = [t["id"] for t in catalog]
+    ranking = team_ids[5:] + team_ids[:5]
+    assert decode_ranking(encode_ranking(ranking, catalog), team_ids) == ranking
+    with pytest.raises(ValueError):
+        encode_ranking(ranking[:-1] + ["gone"], catalog)
+    with pytest.raises(ValueError):
+        decode_ranking([len(team_ids)], team_ids)
+
+
+def test_columns_keep_team_ids_until_the_snapshot_is_recorded(codec):
+    catalog = league_catalog(codec)
+    ranking = [t["id"] for t in catalog][::-1]
+
+    columns = ranking_columns(ranking, catalog)
+    assert columns["rankings"] == ranking and columns["catalog_version"] == catalog_version(catalog)
+
+    assert record_catalog(catalog, service_client())
+    assert codec.tables["catalog_versions"][0]["version"] == catalog_version(catalog)
+    columns = ranking_columns(ranking, catalog)
+    assert columns["rankings"] is None
+    assert rankings_from_row(columns, catalog) == ranking
+
+
+def test_positions_from_an_older_catalog_decode_through_its_snapshot(codec):
+    client = service_client()
+    old_catalog = league_catalog(codec)
+    record_catalog(old_catalog, client)
+    ranking = [t["id"] for t in old_catalog][::-1]
+    row = ranking_columns(ranking, old_catalog)
+
+    # sort_order edited: same teams, new order, new version
+    new_catalog = old_catalog[1:] + old_catalog[:1]
+    assert catalog_version(new_catalog) != row["catalog_version"]
+
+    ranking_codec._snapshots.clear()  # another process: snapshot only in the table
+    assert needs_snapshot(row, new_catalog)
+    decoded = rankings_from_row(row, new_catalog, client)
+    assert decoded == ranking
+
+    team_ids = [t["id"] for t in new_catalog]
+    user_ids, matrix, rejected = position_matrix([{"user_id": "a", "rankings": decoded}], team_ids, new_catalog)
+    assert user_ids == ["a"] and rejected == []
+
+
+def test_a_tampered_snapshot_is_ignored(codec):
+    catalog = league_catalog(codec)
+    record_catalog(catalog, service_client())
+    version = catalog_version(catalog)
+    codec.tables["catalog_versions"][0]["team_ids"] = list(reversed(codec.tables["catalog_versions"][0]["team_ids"]))
+    ranking_codec._snapshots.clear()
+
+    assert catalog_snapshot(version, service_client()) is None
+    row = {"rankings": None, "positions": list(range(len(catalog))), "catalog_version": version}
+    assert rankings_from_row(row, catalog[::-1], service_client()) is None
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import save_queue
+from save_queue import RejectedBatch, SaveQueue
+
+NOW = datetime(2025, 8, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def fast(monkeypatch):
+    monkeypatch.setattr(save_queue, "FLUSH_INTERVAL_SECONDS", 0.01)
+    monkeypatch.setattr(save_queue, "RETRY_BASE_SECONDS", 0.001)
+    monkeypatch.setattr(save_queue, "REQUEUE_DELAY_SECONDS", 0.05)
+
+
+class Writer:
+    """Records written rows; fails the first `failures` calls and rejects rows for user "bad"."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = 0
+        self.rows = {}
+
+    def write(self, rows: list[dict]) -> bool:
+        self.calls += 1
+        if any(row["user_id"] == "bad" for row in rows):
+            raise RejectedBatch("violates check constraint")
+        if self.failures:
+            self.failures -= 1
+            return False
+        for row in rows:
+            self.rows[(row["user_id"], row["league"], row["season"])] = row["rankings"]
+        return True
+
+    async def __call__(self, rows: list[dict]) -> bool:
+        return self.write(rows)
+
+
+def test_saves_for_the_same_key_coalesce():
+    writer = Writer()
+    queue = SaveQueue(writer)
+
+    async def go():
+        first = queue.submit("a", "EPL", "2025/2026", ["x"], NOW)
+        second = queue.submit("a", "EPL", "2025/2026", ["y"], NOW)
+        other = queue.submit("b", "EPL", "2025/2026", ["z"], NOW)
+        return await asyncio.gather(first, second, other)
+
+    assert asyncio.run(go()) == [True, True, True]
+    assert queue.coalesced == 1 and queue.flushed == 2 and writer.calls == 1
+    assert writer.rows[("a", "EPL", "2025/2026")] == ["y"]
+
+
+def test_transient_failures_are_retried():
+    writer = Writer(failures=save_queue.MAX_RETRIES - 1)
+    queue = SaveQueue(writer)
+
+    async def go():
+        return await queue.submit("a", "EPL", "2025/2026", ["x"], NOW)
+
+    assert asyncio.run(go()) is True
+    assert writer.calls == save_queue.MAX_RETRIES
+
+
+def test_a_batch_that_keeps_failing_is_requeued_and_written_later():
+    writer = Writer(failures=save_queue.MAX_RETRIES)
+    queue = SaveQueue(writer)
+
+    async def go():
+        result = await queue.submit("a", "EPL", "2025/2026", ["x"], NOW)
+        assert queue.depth == 1
+        return result, await queue.drain(timeout=1)
+
+    assert asyncio.run(go()) == (False, True)
+    assert writer.rows == {("a", "EPL", "2025/2026"): ["x"]}
+
+
+def test_rejected_rows_are_isolated_and_dropped():
+    writer = Writer()
+    queue = SaveQueue(writer)
+
+    async def go():
+        futures = [queue.submit(f"u{i}", "EPL", "2025/2026", ["x"], NOW) for i in range(20)]
+        futures.insert(7, queue.submit("bad", "EPL", "2025/2026", ["x"], NOW))
+        results = await asyncio.gather(*futures)
+        return results, await queue.drain(timeout=1)
+
+    results, drained = asyncio.run(go())
+    assert drained and results.pop(7) is None
+    assert all(results) and len(writer.rows) == 20
+    assert queue.depth == 0 and not queue._inflight_keys
+
+
+def test_a_cancelled_flush_is_written_at_exit():
+    class Stalled(Writer):
+        async def __call__(self, rows):
+            self.started.set()
+            await asyncio.sleep(10)
+
+    writer = Stalled()
+    queue = SaveQueue(writer, sync_writer=writer.write)
+
+    async def go():
+        writer.started = asyncio.Event()
+        queue.submit("a", "EPL", "2025/2026", ["x"], NOW)
+        queue.submit("bad", "EPL", "2025/2026", ["x"], NOW)
+        await writer.started.wait()
+
+    asyncio.run(go())  # cancels the pending flush as the loop closes
+    assert queue.depth == 2
+    queue.write_remaining(timeout=1)
+    assert queue.depth == 0 and writer.rows == {("a", "EPL", "2025/2026"): ["x"]}
@@ -0,0 +1,66 @@
+import random
+
+import numpy as np
+
+from fake_supabase import LEAGUES, SEASON
+from scoring import SCORING_RULES, position_matrix, score_league, score_matrix
+
+TEAMS = [f"t{i}" for i in range(24)]
+
+
+def brute_force_total(ranking: list[str], standings: list[str], rule: str) -> int:
+    total = 0
+    for predicted, team_id in enumerate(ranking):
+        error = abs(predicted - standings.index(team_id))
+        if rule == "absolute":
+            total += error
+        elif rule == "squared":
+            total += error ** 2
+        else:  # exact_bonus
+            total += error - (3 if error == 0 else 0)
+    return total
+
+
+def test_score_matrix_matches_brute_force():
+    rng = random.Random(1)
+    rankings = {f"u{i}": rng.sample(TEAMS, len(TEAMS)) for i in range(200)}
+    predictions = [{"user_id": u, "rankings": r} for u, r in rankings.items()]
+    standings = rng.sample(TEAMS, len(TEAMS))
+
+    user_ids, matrix, rejected = position_matrix(predictions, standings)
+    assert rejected == [] and user_ids == list(rankings)
+
+    actual = np.arange(len(standings), dtype=np.int16)
+    for rule in SCORING_RULES:
+        scores = score_matrix(matrix, actual, rule)
+        expected = [brute_force_total(rankings[u], standings, rule) for u in user_ids]
+        assert scores["total"].tolist() == expected
+    hits = score_matrix(matrix, actual)["exact_hits"].tolist()
+    assert hits == [sum(a == b for a, b in zip(rankings[u], standings)) for u in user_ids]
+
+
+def test_position_matrix_rejects_rankings_that_are_not_permutations():
+    predictions = [
+        {"user_id": "ok", "rankings": TEAMS},
+        {"user_id": "stale", "rankings": TEAMS[:-1] + ["gone"]},
+        {"user_id": "short", "rankings": TEAMS[:-1]},
+        {"user_id": "duplicate", "rankings": TEAMS[:-1] + [TEAMS[0]]},
+        {"user_id": "empty", "rankings": None},
+    ]
+    user_ids, matrix, rejected = position_matrix(predictions, TEAMS)
+    assert user_ids == ["ok"]
+    assert sorted(rejected) == ["duplicate", "empty", "short", "stale"]
+    assert matrix.tolist() == [list(range(24))]
+
+
+def test_score_league_reads_predictions(fake):
+    teams = [t["id"] for t in fake.tables["teams"] if t["league"] == LEAGUES[0]]
+    fake.tables["predictions"] += [
+        {"user_id": "exact", "league": LEAGUES[0], "season": SEASON, "rankings": teams},
+        {"user_id": "reversed", "league": LEAGUES[0], "season": SEASON, "rankings": teams[::-1]},
+        {"user_id": "stale", "league": LEAGUES[0], "season": SEASON, "rankings": ["gone"] * 24},
+    ]
+    result = score_league(teams, LEAGUES[0], SEASON)
+    assert result["user_ids"] == ["exact", "reversed"]
+    assert result["total"].tolist() == [0, brute_force_total(teams[::-1], teams, "absolute")]
+    assert result["rejected"] == ["stale"]
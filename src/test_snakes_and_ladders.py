@@ -0,0 +1,83 @@
+import random
+
+from games.snakes_and_ladders import BOARD_SIZE, DEFAULT_JUMPS, SnakesAndLadders, result_roll
+
+TEAMS = [f"t{i}" for i in range(20)]
+
+
+def random_fixtures(rng: random.Random) -> list[dict]:
+    teams = rng.sample(TEAMS, len(TEAMS))
+    fixtures = []
+    for home, away in zip(teams[::2], teams[1::2]):
+        played = rng.random() > 0.1
+        fixtures.append({
+            "home_team_id": home, "away_team_id": away,
+            "home_goals": rng.randrange(5) if played else None,
+            "away_goals": rng.randrange(5) if played else None,
+        })
+    return fixtures
+
+
+def brute_force_move(square: int, roll: int) -> int:
+    if square == BOARD_SIZE:
+        return square
+    square += roll
+    if square > BOARD_SIZE:
+        square = 2 * BOARD_SIZE - square
+    return DEFAULT_JUMPS.get(square, square)
+
+
+def brute_force_rolls(fixtures: list[dict]) -> dict:
+    rolls = {}
+    for f in fixtures:
+        if f["home_goals"] is not None:
+            rolls[f["home_team_id"]] = result_roll(f["home_goals"], f["away_goals"])
+            rolls[f["away_team_id"]] = result_roll(f["away_goals"], f["home_goals"])
+    return rolls
+
+
+def test_rounds_match_a_brute_force_simulation():
+    rng = random.Random(4)
+    game = SnakesAndLadders(TEAMS)
+    picks, squares, finished = {}, {}, set()
+    for round_no in range(1, 40):
+        joining = {f"u{i}": rng.choice(TEAMS) for i in rng.sample(range(300), 20)}
+        game.add_players(joining)
+        picks.update(joining)
+        for user_id in joining:
+            squares.setdefault(user_id, 0)
+
+        fixtures = random_fixtures(rng)
+        done = game.resolve_round(round_no, fixtures)
+        rolls = brute_force_rolls(fixtures)
+        for user_id, team_id in picks.items():
+            squares[user_id] = brute_force_move(squares[user_id], rolls.get(team_id, 0))
+        finished |= set(done)
+
+        assert {u: int(game.positions[game.row[u]]) for u in picks} == squares
+    assert finished == {u for u, square in squares.items() if square == BOARD_SIZE}
+    assert game.replay().tolist() == game.positions.tolist()
+
+
+def test_replay_stops_after_a_round():
+    game = SnakesAndLadders(["a", "b"], jumps={})
+    game.add_players({"u": "a"})
+    fixture = [{"home_team_id": "a", "away_team_id": "b", "home_goals": 2, "away_goals": 1}]
+    game.resolve_round(1, fixture)
+    game.resolve_round(2, fixture)
+    assert game.replay(upto_round=1).tolist() == [5]
+    assert game.positions.tolist() == [10]
+
+
+def test_bounce_and_jumps():
+    game = SnakesAndLadders(["a", "b", "c", "d"], board_size=10, jumps={3: 8, 9: 2})
+    game.add_players({"ladder": "a", "bounce": "b", "done": "c"})
+    game.positions[:] = [2, 6, 10]
+    fixtures = [
+        {"home_team_id": "a", "away_team_id": "c", "home_goals": 1, "away_goals": 2},
+        {"home_team_id": "b", "away_team_id": "d", "home_goals": 2, "away_goals": 0},
+    ]
+    # a rolls 1 onto the ladder at 3; b rolls 5 to 11, bounces back to 9 and
+    # takes the snake; c has finished and stays put
+    assert game.resolve_round(1, fixtures).tolist() == ["done"]
+    assert game.positions.tolist() == [8, 2, 10]
@@ -0,0 +1,208 @@
+import base64
+import json
+import threading
+import time
+import traceback
+from pathlib import Path
+
+import jwt
+
+from jwt_verifier import jwt_verifier
+
+SESSION_FILE = Path(".session.json")
+
+# Refresh the access token once it is this close to expiring
+REFRESH_WINDOW_SECONDS = 60
+
+
+def decode_jwt_claims(token: str) -> dict:
+    """Decode a JWT payload without verifying it (only used to read `exp`/`sub`)."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))
+    except Exception:
+        return {}
+
+
+class FileSessionStorage:
+    """Persists the session JSON to a local file (desktop and scripts)."""
+
+    def __init__(self, path: Path = SESSION_FILE):
+        self.path = path
+
+    def read(self) -> str | None:
+        return self.path.read_text() if self.path.exists() else None
+
+    def write(self, value: str):
+        self.path.write_text(value)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+class ClientSessionStorage:
+    """Persists the session JSON in the browser's storage for one Flet page."""
+
+    KEY = "efl_games.session"
+
+    def __init__(self, page):
+        self.page = page
+
+    def read(self) -> str | None:
+        return self.page.client_storage.get(self.KEY)
+
+    def write(self, value: str):
+        self.page.client_storage.set(self.KEY, value)
+
+    def clear(self):
+        self.page.client_storage.remove(self.KEY)
+
+
+class TokenManager:
+    """
+    Keeps the current auth session in memory so callers don't hit disk or
+    Supabase Auth on every request. The access token's `exp` is read locally
+    and the token is only refreshed inside the refresh window.
+    """
+
+    def __init__(self, client=None, storage=None,
+                 refresh_window: float = REFRESH_WINDOW_SECONDS, client_factory=None, verifier=None):
+        self._client = client
+        self._client_factory = client_factory
+        self.verifier = verifier or jwt_verifier
+        self.storage = storage or FileSessionStorage()
+        self.refresh_window = refresh_window
+        self._session = None  # {"access_token", "refresh_token", "expires_at", "user_id", "user"}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """The Supabase client, created through client_factory on first use."""
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    @property
+    def access_token(self) -> str | None:
+        return self._session["access_token"] if self._session else None
+
+    @property
+    def user_id(self) -> str | None:
+        return self._session["user_id"] if self._session else None
+
+    @property
+    def user(self) -> dict | None:
+        """The user saved with the session, as returned at sign-in or refresh."""
+        return self._session["user"] if self._session else None
+
+    def _remember(self, access_token: str, refresh_token: str, user: dict | None = None):
+        claims = decode_jwt_claims(access_token)
+        self._session = {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "expires_at": claims.get("exp", 0),
+            "user_id": claims.get("sub"),
+            "user": user,
+        }
+        self.client.postgrest.auth(access_token)
+
+    def _load(self):
+        """Read the persisted session once per manager."""
+        self._loaded = True
+        try:
+            raw = self.storage.read()
+            if not raw:
+                return
+            saved = json.loads(raw)
+            if not saved.get("access_token") or not saved.get("refresh_token"):
+                return
+            self._remember(saved["access_token"], saved["refresh_token"], saved.get("user"))
+            # An expired token is replaced by the refresh, which Auth validates
+            if not self._needs_refresh() and not self._saved_token_ok():
+                # Storage is browser-controlled; never take its `sub` on trust
+                print("⚠️ Saved session failed verification; discarding it")
+                self.clear()
+        except Exception as ex:
+            print("❌ TokenManager could not read saved session:", ex)
+            self._session = None
+
+    def _saved_token_ok(self) -> bool:
+        """
+        True if the current access token is genuine and names user_id: its
+        signature is checked locally when a key is available, otherwise
+        Supabase Auth is asked once.
+        """
+        try:
+            user = self.verifier.verified_user(self.access_token, lambda: self.client)
+        except jwt.InvalidTokenError:
+            return False
+        except Exception as ex:
+            # Auth unreachable or erroring: the token can't be trusted yet
+            print("⚠️ Could not verify saved session with Supabase Auth:", ex)
+            return False
+        return user["id"] == self.user_id
+
+    def _needs_refresh(self) -> bool:
+        return self._session["expires_at"] - time.time() <= self.refresh_window
+
+    def _refresh(self):
+        res = self.client.auth.refresh_session(self._session["refresh_token"])
+        if res and res.session:
+            self.store(res.session)
+        else:
+            self.clear()
+
+    def store(self, session):
+        """Keep a gotrue Session in memory, persist it and apply the PostgREST header."""
+        self.storage.write(session.model_dump_json())
+        user = session.user.model_dump(mode="json") if session.user else None
+        self._remember(session.access_token, session.refresh_token, user)
+
+    def clear(self):
+        """Forget the session and reset the PostgREST auth header."""
+        self._session = None
+        self.storage.clear()
+
+        # Fall back to the anon key, as the Supabase client does on sign-out
+        if self._client is not None:
+            self._client.postgrest.auth(self._client.supabase_key)
+
+    def ensure_valid(self) -> str | None:
+        """
+        Returns the user ID for a usable session, refreshing it first if it is
+        inside the refresh window. Concurrent callers share one refresh.
+        """
+        if self._session and not self._needs_refresh():
+            return self.user_id
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if not self._session:
+                return None
+            # Another caller may have refreshed while we waited on the lock
+            if self._needs_refresh():
+                try:
+                    self._refresh()
+                except Exception as ex:
+                    print("❌ Token refresh failed:", ex)
+                    traceback.print_exc()
+                    self.clear()
+            return self.user_id
+
+    def sync_auth_client(self) -> bool:
+        """
+        Hand the in-memory session to the Supabase Auth client. Only needed
+        before Auth calls that use its stored session, such as update_user.
+        """
+        if not self.ensure_valid():
+            return False
+        res = self.client.auth.set_session(
+            self._session["access_token"], self._session["refresh_token"]
+        )
+        if res and res.session:
+            self.store(res.session)
+            return True
+        return False
@@ -0,0 +1,37 @@
+import flet as ft
+from supabase_helpers import cancel_route_tasks
+
+
+class ViewCache:
+    """
+    Built views for one Flet session, keyed by route, so navigating back to
+    a route shows the existing controls and state instead of rebuilding
+    them and re-running their queries.
+
+    A view can put {"on_show": callable} in its `data` to restart work that
+    only runs while it is visible (e.g. the countdown).
+    """
+
+    def __init__(self, page: ft.Page):
+        self.page = page
+        self._views = {}
+
+    def get(self, route: str) -> ft.View | None:
+        return self._views.get(route)
+
+    def put(self, route: str, view: ft.View):
+        self._views[route] = view
+
+    def invalidate(self, route: str | None = None):
+        """Drop one cached route, or all of them, and cancel their tasks."""
+        routes = [route] if route else list(self._views)
+        for r in routes:
+            if self._views.pop(r, None) is not None:
+                cancel_route_tasks(self.page, scope=r)
+
+
+def on_show(view: ft.View):
+    """Run the view's on_show hook, if it registered one."""
+    hooks = view.data if isinstance(view.data, dict) else {}
+    if hooks.get("on_show"):
+        hooks["on_show"]()